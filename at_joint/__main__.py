@@ -1,12 +1,20 @@
 import argparse
 import asyncio
+import importlib
 import logging
+import multiprocessing
 import os
+import signal
+import time
+from functools import partial
+from typing import Callable
+from typing import Dict
+from typing import Optional
 
 from at_queue.core.session import ConnectionParameters
 
 from at_joint.core.at_joint import ATJoint
-from at_joint.debug.server import main as debugger_main
+from at_joint.core.startup import StartupProfile
 
 parser = argparse.ArgumentParser(
     prog="at-joint", description="Joint functioning component for AT_SIMULATION, AT_TEMPORAL_SOLVER and at_joint"
@@ -49,36 +57,495 @@ parser.add_argument(
 parser.add_argument(
     "-dp", "--debugger-port", dest="debugger_port", help="Debugger server port", type=int, required=False, default=8000
 )
+parser.add_argument(
+    "--status-cache-ttl",
+    dest="status_cache_ttl",
+    help="Seconds to cache component registration and configuration checks, 0 disables caching",
+    type=float,
+    required=False,
+    default=5.0,
+)
+parser.add_argument(
+    "--user-id-cache-ttl",
+    dest="user_id_cache_ttl",
+    help="Seconds to cache the user id of a token, 0 disables caching",
+    type=float,
+    required=False,
+    default=60.0,
+)
+parser.add_argument(
+    "--user-id-cache-size",
+    dest="user_id_cache_size",
+    help="Maximum number of tokens with a cached user id",
+    type=int,
+    required=False,
+    default=1024,
+)
+parser.add_argument(
+    "--blackboard-delta",
+    action="store_true",
+    dest="blackboard_delta",
+    help="Send only added or changed blackboard items each tact",
+)
+parser.add_argument(
+    "--blackboard-resync-interval",
+    dest="blackboard_resync_interval",
+    help="Number of tacts between full blackboard writes in delta mode, 0 disables resync",
+    type=int,
+    required=False,
+    default=100,
+)
+parser.add_argument(
+    "--blackboard-commit",
+    dest="blackboard_commit",
+    help="Blackboard commit mode: one set_items per stage or batched writes without data dependencies",
+    choices=["stage", "batched"],
+    required=False,
+    default="stage",
+)
+parser.add_argument(
+    "--debug-queue-size",
+    dest="debug_queue_size",
+    help="Maximum number of debug messages waiting to be published, not counting run stop messages",
+    type=int,
+    required=False,
+    default=100,
+)
+parser.add_argument(
+    "--debug-overflow",
+    dest="debug_overflow",
+    help="What to do with debug messages when the queue is full",
+    choices=["drop_oldest", "drop_newest", "coalesce"],
+    required=False,
+    default="drop_oldest",
+)
+parser.add_argument(
+    "--debug-sample-every",
+    dest="debug_sample_every",
+    help="Publish debug messages of every Nth tact only",
+    type=int,
+    required=False,
+    default=1,
+)
+parser.add_argument(
+    "--max-inflight-per-component",
+    dest="max_inflight_per_component",
+    help="Maximum number of concurrent calls to one downstream component, 0 means unlimited",
+    type=int,
+    required=False,
+    default=0,
+)
+parser.add_argument(
+    "--tact-slots",
+    dest="tact_slots",
+    help="Number of tacts of all users that may run their solvers at once, shared fairly between users; "
+    "0 means unlimited",
+    type=int,
+    required=False,
+    default=0,
+)
+parser.add_argument(
+    "--user-weight",
+    dest="user_weights",
+    help="Share of tact slots of a user, as USER=WEIGHT, may be repeated",
+    action="append",
+    required=False,
+    default=[],
+)
+parser.add_argument(
+    "--max-runs",
+    dest="max_runs",
+    help="Maximum number of concurrent process_tact runs, 0 means unlimited",
+    type=int,
+    required=False,
+    default=0,
+)
+parser.add_argument(
+    "--admission",
+    dest="admission",
+    help="What to do with new process_tact runs when --max-runs are running",
+    choices=["queue", "reject"],
+    required=False,
+    default="queue",
+)
+parser.add_argument(
+    "--no-metrics", action="store_false", dest="metrics", help="Do not collect latency and payload metrics"
+)
+parser.add_argument(
+    "--metrics-payload-sample-every",
+    dest="metrics_payload_bytes_sample_every",
+    help="Measure the serialized size of every Nth blackboard write, 0 disables it",
+    type=int,
+    required=False,
+    default=100,
+)
 
+parser.add_argument(
+    "--history-dir",
+    dest="history_dir",
+    help="Directory to record the results of every tact in, history is not recorded by default",
+    required=False,
+    default=None,
+)
 
-async def main(no_debugger=False, **connection_kwargs):
+parser.add_argument(
+    "--simulation-batch-size",
+    dest="simulation_batch_size",
+    help="Number of simulation ticks to fetch with one run_ticks call, simulations without run_ticks get "
+    "one run_tick call per tact",
+    type=int,
+    required=False,
+    default=1,
+)
+parser.add_argument(
+    "--process-pool-size",
+    dest="process_pool_size",
+    help="Number of spare simulation processes to keep for every user and model, so reset does not wait for a "
+    "new one; 0 disables the pool",
+    type=int,
+    required=False,
+    default=0,
+)
+parser.add_argument(
+    "--process-pool-max",
+    dest="process_pool_max",
+    help="Maximum number of spare simulation processes of all users",
+    type=int,
+    required=False,
+    default=16,
+)
+parser.add_argument(
+    "--process-pool-idle-ttl",
+    dest="process_pool_idle_ttl",
+    help="Seconds after which an unused spare simulation process is killed",
+    type=float,
+    required=False,
+    default=600.0,
+)
+parser.add_argument(
+    "--memoize",
+    dest="memoize",
+    help="Name of a time-independent solver component whose results are reused while its blackboard inputs "
+    "do not change, may be repeated",
+    action="append",
+    required=False,
+    default=[],
+)
+parser.add_argument(
+    "--memo-size",
+    dest="memo_size",
+    help="Maximum number of memoized solver results",
+    type=int,
+    required=False,
+    default=256,
+)
+parser.add_argument(
+    "--state-backend",
+    dest="state_backend",
+    help="Where to keep component sets, simulation processes and stop commands of users, "
+    "sqlite lets several workers share them",
+    choices=["memory", "sqlite"],
+    required=False,
+    default="memory",
+)
+parser.add_argument(
+    "--state-path", dest="state_path", help="Database file of the sqlite state backend", required=False, default=None
+)
+parser.add_argument(
+    "--worker-id",
+    dest="worker_id",
+    help="Number of this worker, workers other than 0 register as ATJoint-<id> and are routed users by the others",
+    type=int,
+    required=False,
+    default=0,
+)
+parser.add_argument(
+    "--worker-ttl",
+    dest="worker_ttl",
+    help="Seconds without a heartbeat after which the users of a worker are routed to other workers",
+    type=float,
+    required=False,
+    default=15.0,
+)
+
+parser.add_argument(
+    "--workers",
+    dest="workers",
+    help="Number of ATJoint worker processes to start and supervise, more than 1 needs --state-backend sqlite",
+    type=int,
+    required=False,
+    default=1,
+)
+parser.add_argument(
+    "--profile-startup",
+    action="store_true",
+    dest="profile_startup",
+    help="Log how long every startup phase took",
+)
+
+PIDFILE_DIR = "/var/run/at_joint/"
+
+logger = logging.getLogger("at_joint")
+
+
+def parse_user_weight(value: str):
+    user, _, weight = value.rpartition("=")
+    return user, float(weight)
+
+
+async def start_debugger(profile: StartupProfile) -> Optional[asyncio.Task]:
+    # the debugger stack (fastapi, uvicorn, templates) is imported only when the debugger runs,
+    # in a thread so the ATJoint startup goes on meanwhile
+    with profile.phase("debugger import"):
+        server = await asyncio.to_thread(importlib.import_module, "at_joint.debug.server")
+    return await server.start(profile=profile)
+
+
+async def debugger_main(profile_startup=False):
+    profile = StartupProfile(profile_startup)
+    inspector_task = await start_debugger(profile)
+    profile.log()
+    if inspector_task is not None:
+        await inspector_task
+
+
+async def main(
+    no_debugger=False,
+    status_cache_ttl=5.0,
+    user_id_cache_ttl=60.0,
+    user_id_cache_size=1024,
+    blackboard_delta=False,
+    blackboard_resync_interval=100,
+    blackboard_commit="stage",
+    debug_queue_size=100,
+    debug_overflow="drop_oldest",
+    debug_sample_every=1,
+    max_inflight_per_component=0,
+    tact_slots=0,
+    user_weights=(),
+    max_runs=0,
+    admission="queue",
+    metrics=True,
+    metrics_payload_bytes_sample_every=100,
+    history_dir=None,
+    simulation_batch_size=1,
+    process_pool_size=0,
+    process_pool_max=16,
+    process_pool_idle_ttl=600.0,
+    memoize=(),
+    memo_size=256,
+    state_backend="memory",
+    state_path=None,
+    worker_id=0,
+    worker_ttl=15.0,
+    pidfile="pidfile.pid",
+    profile_startup=False,
+    **connection_kwargs,
+):
+    profile = StartupProfile(profile_startup)
     connection_parameters = ConnectionParameters(**connection_kwargs)
-    joint = ATJoint(connection_parameters=connection_parameters)
-    await joint.initialize()
-    await joint.register()
+    with profile.phase("ATJoint construction"):
+        joint = ATJoint(
+            connection_parameters=connection_parameters,
+            status_cache_ttl=status_cache_ttl,
+            user_id_cache_ttl=user_id_cache_ttl,
+            user_id_cache_size=user_id_cache_size,
+            blackboard_delta=blackboard_delta,
+            blackboard_resync_interval=blackboard_resync_interval,
+            blackboard_commit=blackboard_commit,
+            debug_queue_size=debug_queue_size,
+            debug_overflow=debug_overflow,
+            debug_sample_every=debug_sample_every,
+            max_inflight_per_component=max_inflight_per_component,
+            tact_slots=tact_slots,
+            user_weights=dict(parse_user_weight(user_weight) for user_weight in user_weights),
+            max_runs=max_runs,
+            admission=admission,
+            metrics=metrics,
+            metrics_payload_bytes_sample_every=metrics_payload_bytes_sample_every,
+            history_dir=history_dir,
+            simulation_batch_size=simulation_batch_size,
+            process_pool_size=process_pool_size,
+            process_pool_max=process_pool_max,
+            process_pool_idle_ttl=process_pool_idle_ttl,
+            memoize=list(memoize),
+            memo_size=memo_size,
+            state_backend=state_backend,
+            state_path=state_path,
+            worker_id=worker_id,
+            worker_ttl=worker_ttl,
+        )
+
+    async def start_joint():
+        with profile.phase("ATJoint initialize"):
+            await joint.initialize()
+        with profile.phase("ATJoint register"):
+            await joint.register()
 
+    starting = [start_joint()]
+    if not no_debugger:
+        starting.append(start_debugger(profile))
+    _, *inspector_tasks = await asyncio.gather(*starting)
+
+    write_pidfile(pidfile)
+    profile.log()
+
+    loop = asyncio.get_event_loop()
+    task = loop.create_task(joint.start())
+    for inspector_task in inspector_tasks:
+        if inspector_task is not None:
+            await inspector_task
+    await task
+
+
+def write_pidfile(name: str):
     try:
-        if not os.path.exists("/var/run/at_joint/"):
-            os.makedirs("/var/run/at_joint/")
+        if not os.path.exists(PIDFILE_DIR):
+            os.makedirs(PIDFILE_DIR)
 
-        with open("/var/run/at_joint/pidfile.pid", "w") as f:
+        with open(os.path.join(PIDFILE_DIR, name), "w") as f:
             f.write(str(os.getpid()))
     except PermissionError:
         pass
-    
-    loop = asyncio.get_event_loop()
-    task = loop.create_task(joint.start())
+
+
+def remove_pidfile(name: str):
+    try:
+        os.remove(os.path.join(PIDFILE_DIR, name))
+    except OSError:
+        pass
+
+
+async def serve(coroutine):
+    # SIGTERM and SIGINT cancel the process instead of killing it, so asyncio.run can clean up
+    loop = asyncio.get_running_loop()
+    task = asyncio.current_task()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, task.cancel)
+    try:
+        await coroutine
+    except asyncio.CancelledError:
+        pass
+
+
+def run_worker(worker_id: int, args_dict: dict):
+    logging.basicConfig(level=logging.INFO)
+    pidfile = f"worker-{worker_id}.pid"
+    asyncio.run(serve(main(**{**args_dict, "worker_id": worker_id, "no_debugger": True, "pidfile": pidfile})))
+
+
+def run_debugger(args_dict: dict):
+    logging.basicConfig(level=logging.INFO)
+    write_pidfile("debugger.pid")
+    asyncio.run(serve(debugger_main(args_dict.get("profile_startup", False))))
+
+
+def run_target(target: Callable[[], None]):
+    # forked processes inherit the signal handlers of the supervisor
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    target()
+
+
+class Supervisor:
+    def __init__(
+        self,
+        targets: Dict[str, Callable[[], None]],
+        restart_delay: float = 1.0,
+        max_restart_delay: float = 30.0,
+        shutdown_timeout: float = 10.0,
+    ):
+        # fork keeps sys.argv, which the debugger parses again
+        self.context = multiprocessing.get_context("fork")
+        self.targets = targets
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.shutdown_timeout = shutdown_timeout
+        self.processes: Dict[str, multiprocessing.Process] = {}
+        self.started: Dict[str, float] = {}
+        self.failures: Dict[str, int] = {name: 0 for name in targets}
+        self.restart_at: Dict[str, float] = {}
+        self.stopping = False
+
+    def start(self, name: str):
+        process = self.context.Process(target=run_target, args=(self.targets[name],), name=name, daemon=False)
+        process.start()
+        self.processes[name] = process
+        self.started[name] = time.monotonic()
+        logger.info("Started %s with pid %s", name, process.pid)
+
+    def stop(self, *_):
+        self.stopping = True
+
+    def check(self):
+        now = time.monotonic()
+        for name, process in list(self.processes.items()):
+            if process.is_alive() or name in self.restart_at:
+                continue
+            # a process that ran for a while before it died is restarted right away
+            if now - self.started[name] > self.max_restart_delay:
+                self.failures[name] = 0
+            delay = min(self.restart_delay * 2 ** self.failures[name], self.max_restart_delay)
+            self.failures[name] += 1
+            logger.warning("%s exited with code %s, restarting in %.1f s", name, process.exitcode, delay)
+            self.restart_at[name] = now + delay
+        for name, restart_at in list(self.restart_at.items()):
+            if restart_at <= now:
+                del self.restart_at[name]
+                self.start(name)
+
+    def shutdown(self):
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + self.shutdown_timeout
+        for name, process in self.processes.items():
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning("%s did not stop in %.1f s, killing it", name, self.shutdown_timeout)
+                process.kill()
+                process.join()
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for name in self.targets:
+            self.start(name)
+        try:
+            while not self.stopping:
+                self.check()
+                time.sleep(0.5)
+        finally:
+            self.shutdown()
+
+
+def supervise(workers: int, args_dict: dict):
+    if args_dict.get("state_backend", "memory") == "memory":
+        parser.error("--workers needs a shared state backend, use --state-backend sqlite")
+    no_debugger = args_dict.pop("no_debugger", False)
+    targets = {f"worker-{worker_id}": partial(run_worker, worker_id, args_dict) for worker_id in range(workers)}
     if not no_debugger:
-        await debugger_main()
-    await task
+        targets["debugger"] = partial(run_debugger, args_dict)
+
+    logging.basicConfig(level=logging.INFO)
+    write_pidfile("pidfile.pid")
+    try:
+        Supervisor(targets).run()
+    finally:
+        for name in list(targets) + ["pidfile"]:
+            remove_pidfile(f"{name}.pid")
 
 
 if __name__ == "__main__":
-    args = parser.parse_args()
+    # options of the debugger server are parsed by its own parser
+    args, _ = parser.parse_known_args()
     args_dict = vars(args)
+    workers = args_dict.pop("workers", 1)
 
     if args_dict.pop("debugger_only", False):
-        asyncio.run(debugger_main())
+        asyncio.run(debugger_main(args_dict.get("profile_startup", False)))
+    elif workers > 1:
+        supervise(workers, args_dict)
     else:
         logging.basicConfig(level=logging.INFO)
         asyncio.run(main(**args_dict))
@@ -1,11 +1,26 @@
 import asyncio
+import logging
+import time
+from collections import Counter
+from collections import deque
+from contextlib import AsyncExitStack
+from dataclasses import asdict
 from dataclasses import dataclass
+from functools import partial
 from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Deque
 from typing import Dict
+from typing import Iterable
 from typing import List
+from typing import MutableMapping
+from typing import Set
+from typing import Tuple
 from typing import TypedDict
 from typing import Union
 from uuid import UUID
+from uuid import uuid4
 
 from aio_pika import IncomingMessage
 from at_config.core.at_config_handler import ATComponentConfig
@@ -13,15 +28,64 @@ from at_queue.core.at_component import ATComponent
 from at_queue.core.session import ConnectionParameters
 from at_queue.utils.decorators import authorized_method
 
+from at_joint.core.blackboard import BlackboardDeltaTracker
+from at_joint.core.cache import CONFIGURED
+from at_joint.core.cache import REGISTERED
+from at_joint.core.cache import StatusCache
+from at_joint.core.cache import UserIdCache
+from at_joint.core.columnar import ResourceFrame
+from at_joint.core.columnar import ResourceSchema
+from at_joint.core.debug_publisher import DebugPublisher
+from at_joint.core.debug_publisher import DROP_OLDEST
+from at_joint.core.history import HistoryStore
+from at_joint.core.memo import StageMemo
+from at_joint.core.metrics import COUNTER
+from at_joint.core.metrics import GAUGE
+from at_joint.core.metrics import HISTOGRAM
+from at_joint.core.metrics import Metrics
+from at_joint.core.metrics import SIZE_BUCKETS
+from at_joint.core.metrics import user_label
+from at_joint.core.pacing import OVERRUN_CATCH_UP
+from at_joint.core.pacing import SCHEDULE_DELAY
+from at_joint.core.pacing import SCHEDULE_FIXED_RATE
+from at_joint.core.pacing import SCHEDULES
+from at_joint.core.pacing import TactPacer
+from at_joint.core.process_pool import SimulationProcessPool
+from at_joint.core.results import get_projection
+from at_joint.core.results import materialize
+from at_joint.core.results import TactResults
+from at_joint.core.results import TactSink
+from at_joint.core.results import VERBOSITY_FULL
+from at_joint.core.state import get_state_backend
+from at_joint.core.state import STATE_MEMORY
+from at_joint.core.state import StateBackend
+from at_joint.core.tenancy import ADMISSION_QUEUE
+from at_joint.core.tenancy import AdmissionControl
+from at_joint.core.tenancy import ComponentLimiter
+from at_joint.core.tenancy import FairScheduler
+from at_joint.core.tenancy import UserRuns
+
+
+logger = logging.getLogger(__name__)
 
 AT_SOLVER = "ATSolver"
 AT_TEMPORAL_SOLVER = "ATTemporalSolver"
 AT_SIMULATION = "ATSimulation"
 AT_BLACKBOARD = "ATBlackBoard"
+AT_JOINT_DEBUGGER = "ATJointDebugger"
+AT_JOINT = "ATJoint"
+
+STAGE_SECONDS = "at_joint_stage_seconds"
+TACT_SECONDS = "at_joint_tact_seconds"
+RUN_SECONDS = "at_joint_run_seconds"
+BLACKBOARD_ITEMS = "at_joint_blackboard_items"
+BLACKBOARD_BYTES = "at_joint_blackboard_bytes"
+PIPELINE_QUEUE_DEPTH = "at_joint_pipeline_queue_depth"
 
+BLACKBOARD_COMMIT_STAGE = "stage"
+BLACKBOARD_COMMIT_BATCHED = "batched"
 
-class ResourceMPDict(TypedDict):
-    resource_name: str
+SWEEP_COMPONENTS = ("at_solver", "at_temporal_solver", "at_simulation", "at_blackboard")
 
 
 class ResourceParameterRequired(TypedDict):
@@ -41,17 +105,132 @@ class ComponentSet:
 
 
 class ATJoint(ATComponent):
-    component_sets: Dict[str, ComponentSet]
-    stop_command: Dict[str, Union[bool, None]]
-    at_simulation_processes: Dict[str, int | str]
-    at_translated_files: Dict[str, str]
+    state: StateBackend
+    component_sets: MutableMapping[str, ComponentSet]
+    stop_command: MutableMapping[str, Union[bool, None]]
+    at_simulation_processes: MutableMapping[str, int | str]
+    at_translated_files: MutableMapping[str, str]
+    worker_name: str
+    worker_ttl: float
+    owners: MutableMapping[str, str]
+    workers: MutableMapping[str, float]
+    status_cache: StatusCache
+    user_id_cache: UserIdCache
+    blackboard_delta: bool
+    blackboard_resync_interval: int
+    blackboard_trackers: Dict[str, BlackboardDeltaTracker]
+    blackboard_commit: str
+    blackboard_pending: Dict[str, List[dict]]
+    solver_items: Dict[str, List[dict]]
+    resource_schemas: Dict[str, ResourceSchema]
+    simulation_batch_size: int
+    prefetched_ticks: Dict[str, Tuple[int | str, Deque[dict]]]
+    batch_unsupported: Set[str]
+    reset_unsupported: Set[str]
+    process_pool: SimulationProcessPool
+    run_parents: Dict[str, str | int]
+    memo: StageMemo
+    debug_publisher: DebugPublisher
+    component_limiter: ComponentLimiter
+    fair_scheduler: FairScheduler
+    admission: AdmissionControl
+    metrics: Metrics
+    history: HistoryStore | None
 
-    def __init__(self, connection_parameters: ConnectionParameters, *args, **kwargs):
+    def __init__(
+        self,
+        connection_parameters: ConnectionParameters,
+        *args,
+        status_cache_ttl: float = 5.0,
+        user_id_cache_ttl: float = 60.0,
+        user_id_cache_size: int = 1024,
+        blackboard_delta: bool = False,
+        blackboard_resync_interval: int = 100,
+        blackboard_commit: str = BLACKBOARD_COMMIT_STAGE,
+        debug_queue_size: int = 100,
+        debug_overflow: str = DROP_OLDEST,
+        debug_sample_every: int = 1,
+        max_inflight_per_component: int = 0,
+        tact_slots: int = 0,
+        user_weights: Dict[str, float] = None,
+        max_runs: int = 0,
+        admission: str = ADMISSION_QUEUE,
+        metrics: bool = True,
+        metrics_payload_bytes_sample_every: int = 100,
+        history_dir: str = None,
+        simulation_batch_size: int = 1,
+        process_pool_size: int = 0,
+        process_pool_max: int = 16,
+        process_pool_idle_ttl: float = 600.0,
+        memoize: List[str] = None,
+        memo_size: int = 256,
+        state_backend: str = STATE_MEMORY,
+        state_path: str = None,
+        worker_id: int = 0,
+        worker_ttl: float = 15.0,
+        **kwargs
+    ):
+        # worker 0 keeps the well-known component name, the other workers are addressed by their own names
+        self.worker_name = f"{AT_JOINT}-{worker_id}" if worker_id else AT_JOINT
+        if worker_id:
+            kwargs.setdefault("name", self.worker_name)
         super().__init__(connection_parameters, *args, **kwargs)
-        self.component_sets = {}
-        self.stop_command = {}
-        self.at_simulation_processes = {}
-        self.at_translated_files = {}
+        self.state = get_state_backend(state_backend, path=state_path)
+        if worker_id and not self.state.shared:
+            raise ValueError("Several ATJoint workers need a shared state backend")
+        self.component_sets = self.state.mapping(
+            "component_sets", encode=asdict, decode=lambda value: ComponentSet(**value)
+        )
+        self.stop_command = self.state.mapping("stop_command")
+        self.at_simulation_processes = self.state.mapping("at_simulation_processes")
+        self.at_translated_files = self.state.mapping("at_translated_files")
+        self.worker_ttl = worker_ttl
+        self.owners = self.state.mapping("owners")
+        self.workers = self.state.mapping("workers")
+        # configuration may be received by any worker, the owner of the user compares generations to notice it
+        self.config_generations = self.state.mapping("config_generations")
+        self.seen_generations = {}
+        self.heartbeat_task: asyncio.Task | None = None
+        self.run_parents = {}
+        self.memo = StageMemo(components=memoize, max_size=memo_size)
+        self.status_cache = StatusCache(ttl=status_cache_ttl)
+        self.user_id_cache = UserIdCache(ttl=user_id_cache_ttl, max_size=user_id_cache_size)
+        self.blackboard_delta = blackboard_delta
+        self.blackboard_resync_interval = blackboard_resync_interval
+        self.blackboard_trackers = {}
+        if blackboard_commit not in (BLACKBOARD_COMMIT_STAGE, BLACKBOARD_COMMIT_BATCHED):
+            raise ValueError(f"Unknown blackboard commit mode: {blackboard_commit}")
+        self.blackboard_commit = blackboard_commit
+        self.blackboard_pending = {}
+        self.solver_items = {}
+        self.resource_schemas = {}
+        self.simulation_batch_size = simulation_batch_size
+        self.prefetched_ticks = {}
+        self.batch_unsupported = set()
+        self.reset_unsupported = set()
+        self.process_pool = SimulationProcessPool(
+            self.create_simulation_process,
+            self.kill_simulation_process,
+            size=process_pool_size,
+            max_total=process_pool_max,
+            idle_ttl=process_pool_idle_ttl,
+        )
+        self.debug_publisher = DebugPublisher(
+            self.send_debug, max_size=debug_queue_size, overflow=debug_overflow, sample_every=debug_sample_every
+        )
+        self.component_limiter = ComponentLimiter(max_inflight=max_inflight_per_component)
+        self.fair_scheduler = FairScheduler(slots=tact_slots, weights=user_weights)
+        self.admission = AdmissionControl(max_runs=max_runs, policy=admission)
+        self.user_runs = UserRuns()
+        self.metrics = Metrics(enabled=metrics, payload_bytes_sample_every=metrics_payload_bytes_sample_every)
+        self.metrics.describe(STAGE_SECONDS, HISTOGRAM, "Latency of a tact stage or blackboard call")
+        self.metrics.describe(TACT_SECONDS, HISTOGRAM, "Latency of a tact from simulation tick to solver results")
+        self.metrics.describe(RUN_SECONDS, HISTOGRAM, "Duration of a process_tact run")
+        self.metrics.describe(BLACKBOARD_ITEMS, HISTOGRAM, "Number of items per blackboard set_items call")
+        self.metrics.describe(BLACKBOARD_BYTES, HISTOGRAM, "Serialized size of sampled blackboard set_items calls")
+        self.metrics.describe(PIPELINE_QUEUE_DEPTH, GAUGE, "Simulation ticks fetched and waiting for the solvers")
+        self.metrics.add_collector(self.collect_metrics)
+        self.history = HistoryStore(history_dir) if history_dir else None
 
     async def perform_configurate(self, config: ATComponentConfig, auth_token: str = None, *args, **kwargs) -> bool:
         at_solver_item = config.items.get("at_solver")
@@ -72,16 +251,24 @@ class ATJoint(ATComponent):
         if at_simulation_file is None:
             raise ValueError('Expected "at_simulation_file" id provided')
 
-        process = await self.exec_external_method(
-            at_simulation,
-            "create_process",
-            {"process_name": "runtime_process", "file_id": at_simulation_file.data},
-            auth_token=auth_token,
-        )
+        self.status_cache.invalidate(auth_token=auth_token)
+        self.batch_unsupported.discard(at_simulation)
+        process_id = self.process_pool.take(at_simulation, at_simulation_file.data, auth_token)
+        if process_id is None:
+            process_id = await self.create_simulation_process(at_simulation, at_simulation_file.data, auth_token)
         auth_token_or_user_id = await self.get_user_id_or_token(auth_token, raize_on_failed=False)
+        previous_set = self.component_sets.get(auth_token_or_user_id)
+        previous_process_id = self.at_simulation_processes.get(auth_token_or_user_id)
+        self.forget_user(auth_token_or_user_id)
+        generation = self.seen_generations[auth_token_or_user_id] = uuid4().hex
+        self.config_generations[auth_token_or_user_id] = generation
         self.at_translated_files[auth_token_or_user_id] = at_simulation_file.data
 
-        self.at_simulation_processes[auth_token_or_user_id] = process.get("id")
+        self.at_simulation_processes[auth_token_or_user_id] = process_id
+        if previous_process_id is not None and previous_process_id != process_id:
+            # nothing runs the process of the previous configuration anymore
+            previous_simulation = previous_set.at_simulation if previous_set is not None else at_simulation
+            self.process_pool.retire(previous_simulation, previous_process_id, auth_token)
 
         at_blackboard_item = config.items.get("at_blackboard")
         at_blackboard = AT_BLACKBOARD
@@ -96,6 +283,16 @@ class ATJoint(ATComponent):
             auth_token=auth_token,
         )
 
+    async def get_user_id_or_token(self, auth_token: str, raize_on_failed: bool = True):
+        user_id = self.user_id_cache.get(auth_token)
+        if user_id is not None:
+            return user_id
+        user_id = await super().get_user_id_or_token(auth_token, raize_on_failed=raize_on_failed)
+        # tokens that were not resolved are not cached, a call with raize_on_failed should still fail for them
+        if user_id != auth_token:
+            self.user_id_cache.set(auth_token, user_id)
+        return user_id
+
     async def check_configured(
         self,
         *args,
@@ -135,7 +332,11 @@ class ATJoint(ATComponent):
 
     def get_stop_command(self, auth_token_or_user_id: str | int = None):
         auth_token_or_user_id = auth_token_or_user_id or 'default'
-        return self.stop_command.get(auth_token_or_user_id, False)
+        if self.stop_command.get(auth_token_or_user_id, False):
+            return True
+        # runs of a sweep stop with the user that started them
+        parent = self.run_parents.get(auth_token_or_user_id)
+        return parent is not None and self.stop_command.get(parent, False)
 
     def get_at_simulation_process_id(self, auth_token_or_user_id: str = None):
         auth_token_or_user_id = auth_token_or_user_id or 'default'
@@ -148,6 +349,178 @@ class ATJoint(ATComponent):
         except ValueError:
             return False
 
+    async def is_component_registered(self, component: str) -> bool:
+        registered = self.status_cache.get(REGISTERED, component)
+        if registered is None:
+            registered = await self.check_external_registered(component)
+            self.status_cache.set(REGISTERED, component, registered)
+        return registered
+
+    async def is_component_ready(self, component: str, auth_token: str = None) -> bool:
+        if not await self.is_component_registered(component):
+            return False
+
+        configured = self.status_cache.get(CONFIGURED, component, auth_token)
+        if configured is None:
+            configured = await self.check_external_configured(component, auth_token=auth_token)
+            self.status_cache.set(CONFIGURED, component, configured, auth_token)
+        return configured
+
+    async def exec_component_method(
+        self, component: str, method: str, method_args: dict, auth_token: str = None, limit: bool = True
+    ):
+        try:
+            async with self.component_limiter.acquire(component if limit else None):
+                return await self.exec_external_method(component, method, method_args, auth_token=auth_token)
+        except Exception:
+            # any failed call may mean the component is gone or lost the configuration of the token,
+            # so both are checked again next time instead of guessing from the error text
+            self.status_cache.invalidate(component=component, kind=REGISTERED)
+            self.status_cache.invalidate(component=component, auth_token=auth_token, kind=CONFIGURED)
+            raise
+
+    async def forward(self, owner: str, method: str, method_args: dict, auth_token: str = None):
+        # a forwarded run would hold a slot of the other worker for its whole duration, so it is not limited
+        return await self.exec_component_method(owner, method, method_args, auth_token=auth_token, limit=False)
+
+    def get_blackboard_tracker(self, auth_token_or_user_id: str | int = None) -> BlackboardDeltaTracker | None:
+        if not self.blackboard_delta:
+            return None
+        auth_token_or_user_id = auth_token_or_user_id or "default"
+        tracker = self.blackboard_trackers.get(auth_token_or_user_id)
+        if tracker is None:
+            tracker = BlackboardDeltaTracker(resync_interval=self.blackboard_resync_interval)
+            self.blackboard_trackers[auth_token_or_user_id] = tracker
+        return tracker
+
+    def get_resource_schema(self, auth_token_or_user_id: str | int = None) -> ResourceSchema:
+        auth_token_or_user_id = auth_token_or_user_id or "default"
+        schema = self.resource_schemas.get(auth_token_or_user_id)
+        if schema is None:
+            schema = self.resource_schemas[auth_token_or_user_id] = ResourceSchema()
+        return schema
+
+    def forget_user(self, auth_token_or_user_id: str | int):
+        self.blackboard_trackers.pop(auth_token_or_user_id, None)
+        self.blackboard_pending.pop(auth_token_or_user_id, None)
+        self.solver_items.pop(auth_token_or_user_id, None)
+        self.resource_schemas.pop(auth_token_or_user_id, None)
+        self.prefetched_ticks.pop(auth_token_or_user_id, None)
+        self.memo.forget(auth_token_or_user_id)
+
+    async def start(self, *args, **kwargs):
+        if self.state.shared and self.heartbeat_task is None:
+            self.heartbeat_task = asyncio.get_event_loop().create_task(self.heartbeat())
+        try:
+            return await super().start(*args, **kwargs)
+        finally:
+            await self.shutdown()
+
+    async def shutdown(self):
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
+            self.heartbeat_task = None
+            # users of this worker are routed to the others right away instead of after worker_ttl
+            self.workers.pop(self.worker_name, None)
+        await self.process_pool.close()
+        await self.debug_publisher.close()
+        if self.history is not None:
+            self.history.close()
+
+    async def heartbeat(self):
+        while True:
+            self.workers[self.worker_name] = time.time()
+            await asyncio.sleep(self.worker_ttl / 3)
+
+    def live_workers(self) -> List[str]:
+        now = time.time()
+        return [worker for worker, seen in self.workers.items() if now - seen <= self.worker_ttl]
+
+    def route(self, auth_token_or_user_id: str | int) -> str | None:
+        # returns the worker that serves the user when it is not this one, the tacts of a user always
+        # run on one worker, since blackboard trackers, resource schemas and history files are per process
+        if not self.state.shared:
+            return None
+        auth_token_or_user_id = auth_token_or_user_id or "default"
+        live = self.live_workers()
+        owner = self.owners.get(auth_token_or_user_id)
+        if owner != self.worker_name and owner not in live:
+            # new users and users of stopped workers go to the worker serving the fewest users
+            loads = Counter(worker for worker in self.owners.values() if worker in live)
+            candidates = set(live) | {self.worker_name}
+            candidate = min(candidates, key=lambda worker: (loads[worker], worker != self.worker_name, worker))
+            # another worker may be claiming the user at the same time, the claim stored first wins
+            if owner is None:
+                owner = self.owners.setdefault(auth_token_or_user_id, candidate)
+            else:
+                owner = self.owners.replace(auth_token_or_user_id, owner, candidate)
+            if owner == self.worker_name:
+                # whatever is left from the last time this worker served the user may be stale
+                self.forget_user(auth_token_or_user_id)
+        if owner == self.worker_name:
+            generation = self.config_generations.get(auth_token_or_user_id)
+            if self.seen_generations.get(auth_token_or_user_id) != generation:
+                # the user was configured through another worker
+                self.forget_user(auth_token_or_user_id)
+                self.seen_generations[auth_token_or_user_id] = generation
+        return owner if owner != self.worker_name else None
+
+    async def set_blackboard_items(
+        self,
+        items: List[dict] | ResourceFrame,
+        c_set: ComponentSet,
+        auth_token: str,
+        auth_token_or_user_id: str | int,
+        defer: bool = False,
+    ):
+        tracker = self.get_blackboard_tracker(auth_token_or_user_id)
+        if isinstance(items, ResourceFrame):
+            items = tracker.changed_frame(items) if tracker is not None else items.to_items()
+        elif tracker is not None:
+            items = tracker.changed(items)
+
+        if self.blackboard_commit == BLACKBOARD_COMMIT_BATCHED:
+            pending = self.blackboard_pending.pop(auth_token_or_user_id, None)
+            if pending:
+                merged = {item["ref"]: item for item in pending}
+                merged.update((item["ref"], item) for item in items)
+                items = list(merged.values())
+            if defer:
+                self.blackboard_pending[auth_token_or_user_id] = items
+                return
+
+        if not items and tracker is not None:
+            return
+        user = user_label(auth_token_or_user_id)
+        self.metrics.observe(
+            BLACKBOARD_ITEMS, len(items), buckets=SIZE_BUCKETS, component=c_set.at_blackboard, user=user
+        )
+        self.metrics.observe_payload(BLACKBOARD_BYTES, items, component=c_set.at_blackboard, user=user)
+        try:
+            with self.metrics.time(STAGE_SECONDS, stage="set_items", component=c_set.at_blackboard, user=user):
+                await self.exec_component_method(
+                    c_set.at_blackboard, "set_items", {"items": items}, auth_token=auth_token
+                )
+        except Exception:
+            if tracker is not None:
+                tracker.forget()
+            raise
+
+    async def flush_blackboard_items(self, c_set: ComponentSet, auth_token: str, auth_token_or_user_id: str | int):
+        if self.blackboard_pending.get(auth_token_or_user_id):
+            await self.set_blackboard_items([], c_set, auth_token, auth_token_or_user_id)
+
+    def drop_blackboard_items(self, auth_token_or_user_id: str | int):
+        # solver items left from a failed run must not be written together with the items of the next one,
+        # and the tracker forgets them since they never reached the blackboard
+        if self.blackboard_pending.pop(auth_token_or_user_id, None):
+            tracker = self.blackboard_trackers.get(auth_token_or_user_id)
+            if tracker is not None:
+                tracker.forget()
+            # memoized results were keyed by solver items the blackboard now lacks
+            self.solver_items.pop(auth_token_or_user_id, None)
+            self.memo.forget(auth_token_or_user_id)
+
     def _items_from_resource_parameters(self, resource_parameters: List[ResourceParameterType]) -> List:
         items = []
         for resource in resource_parameters:
@@ -156,39 +529,81 @@ class ATJoint(ATComponent):
         return items
 
     def _items_from_solver_result(self, solver_result) -> List:
-        return [
-            {
-                "ref": key,
-                "value": wm_item["content"],
-                "belief": wm_item.get("non_factor", {}).get("belief"),
-                "probability": wm_item.get("non_factor", {}).get("probability"),
-                "accuracy": wm_item.get("non_factor", {}).get("accuracy"),
-            }
-            for key, wm_item in solver_result.get("wm", {}).items()
-        ]
+        items = []
+        for key, wm_item in solver_result.get("wm", {}).items():
+            non_factor = wm_item.get("non_factor") or {}
+            items.append(
+                {
+                    "ref": key,
+                    "value": wm_item["content"],
+                    "belief": non_factor.get("belief"),
+                    "probability": non_factor.get("probability"),
+                    "accuracy": non_factor.get("accuracy"),
+                }
+            )
+        return items
 
-    async def process_simulation(self, auth_token: str, auth_token_or_user_id: str | int) -> bool:
+    async def process_simulation(self, auth_token: str, auth_token_or_user_id: str | int, ahead: int = 1) -> bool:
         c_set = self.get_component_set(auth_token_or_user_id)
-        if await self.check_external_registered(c_set.at_simulation):
-            if await self.check_external_configured(c_set.at_simulation, auth_token=auth_token):
-                tact = await self.exec_external_method(
+        user = user_label(auth_token_or_user_id)
+        with self.metrics.time(STAGE_SECONDS, stage="at_simulation", component=c_set.at_simulation, user=user):
+            if await self.is_component_ready(c_set.at_simulation, auth_token=auth_token):
+                process_id = self.get_at_simulation_process_id(auth_token_or_user_id)
+                prefetched = self.prefetched_ticks.get(auth_token_or_user_id)
+                if prefetched is not None and prefetched[0] == process_id and prefetched[1]:
+                    return prefetched[1].popleft()
+
+                # ahead is the number of ticks the caller is going to take, at most simulation_batch_size
+                # of them are fetched at once when the simulation supports run_ticks
+                count = min(self.simulation_batch_size, ahead)
+                batch_error = None
+                if count > 1 and c_set.at_simulation not in self.batch_unsupported:
+                    try:
+                        ticks = await self.run_ticks(c_set.at_simulation, process_id, count, auth_token)
+                    except (asyncio.TimeoutError, TimeoutError, ConnectionError):
+                        raise
+                    except Exception as e:
+                        batch_error = e
+                    else:
+                        if ticks:
+                            self.prefetched_ticks[auth_token_or_user_id] = (process_id, deque(ticks[1:]))
+                            return ticks[0]
+
+                tact = await self.exec_component_method(
                     c_set.at_simulation,
                     "run_tick",
-                    {"process_id": self.get_at_simulation_process_id(auth_token_or_user_id)},
+                    {"process_id": process_id},
                     auth_token=auth_token,
                 )
+                if batch_error is not None:
+                    # run_ticks failed where run_tick works, so the simulation does not support it
+                    logger.warning(
+                        "%s does not support run_ticks, falling back to run_tick",
+                        c_set.at_simulation,
+                        exc_info=batch_error,
+                    )
+                    self.batch_unsupported.add(c_set.at_simulation)
                 return tact
         return {"resources": []}
 
+    async def run_ticks(self, component: str, process_id: int | str, count: int, auth_token: str) -> List[dict]:
+        result = await self.exec_component_method(
+            component, "run_ticks", {"process_id": process_id, "count": count}, auth_token=auth_token
+        )
+        return result.get("ticks") if isinstance(result, dict) else result
+
     async def process_temporal_solver(self, auth_token: str, auth_token_or_user_id: str | int) -> bool:
         c_set = self.get_component_set(auth_token_or_user_id)
-        if await self.check_external_registered(c_set.at_temporal_solver):
-            if await self.check_external_configured(c_set.at_temporal_solver, auth_token=auth_token):
-                await self.exec_external_method(
+        user = user_label(auth_token_or_user_id)
+        with self.metrics.time(
+            STAGE_SECONDS, stage="at_temporal_solver", component=c_set.at_temporal_solver, user=user
+        ):
+            if await self.is_component_ready(c_set.at_temporal_solver, auth_token=auth_token):
+                await self.exec_component_method(
                     c_set.at_temporal_solver, "update_wm_from_bb", {}, auth_token=auth_token
                 )
 
-                temporal_result = await self.exec_external_method(
+                temporal_result = await self.exec_component_method(
                     c_set.at_temporal_solver, "process_tact", {}, auth_token=auth_token
                 )
                 return temporal_result
@@ -196,127 +611,653 @@ class ATJoint(ATComponent):
 
     async def process_solver(self, auth_token: str, auth_token_or_user_id: str | int):
         c_set = self.get_component_set(auth_token_or_user_id)
-        if await self.check_external_registered(c_set.at_solver):
-            if await self.check_external_configured(c_set.at_solver, auth_token=auth_token):
-                await self.exec_external_method(c_set.at_solver, "update_wm_from_bb", {}, auth_token=auth_token)
-                solver_result = await self.exec_external_method(c_set.at_solver, "run", {}, auth_token=auth_token)
+        user = user_label(auth_token_or_user_id)
+        with self.metrics.time(STAGE_SECONDS, stage="at_solver", component=c_set.at_solver, user=user):
+            if await self.is_component_ready(c_set.at_solver, auth_token=auth_token):
+                await self.exec_component_method(c_set.at_solver, "update_wm_from_bb", {}, auth_token=auth_token)
+                solver_result = await self.exec_component_method(c_set.at_solver, "run", {}, auth_token=auth_token)
                 return solver_result
         return {"wm": {}, "trace": {"steps": []}}
 
-    async def debug(self, initiator: str, data: dict, auth_token: str):
-        if await self.check_external_registered("ATJointDebugger"):
-            await self.exec_external_method(
-                "ATJointDebugger", "debug", {"data": {"initiator": initiator, "data": data}}, auth_token=auth_token
+    async def send_debug(self, initiator: str, data: dict | ResourceFrame, auth_token: str):
+        if await self.is_component_registered(AT_JOINT_DEBUGGER):
+            if isinstance(data, ResourceFrame):
+                data = data.to_resource_parameters()
+            await self.exec_component_method(
+                AT_JOINT_DEBUGGER,
+                "debug",
+                {"data": {"initiator": initiator, "data": data}},
+                auth_token=auth_token,
+                limit=False,
             )
 
+    async def debug(self, initiator: str, data: dict, auth_token: str, tact: int = None, control: bool = False):
+        self.debug_publisher.publish(initiator, data, auth_token, tact=tact, control=control)
+
     @authorized_method
     async def reset(self, auth_token: str = None):
         auth_token = auth_token or "default"
         auth_token_or_user_id = await self.get_user_id_or_token(auth_token, raize_on_failed=False)
         process_id = self.get_at_simulation_process_id(auth_token_or_user_id)
         c_set = self.get_component_set(auth_token_or_user_id)
-        await self.exec_external_method(
-            c_set.at_simulation, "kill_process", {"process_id": process_id}, auth_token=auth_token
-        )
+        owner = self.route(auth_token_or_user_id)
+        if owner is not None:
+            return await self.forward(owner, "reset", {}, auth_token=auth_token)
+        self.status_cache.invalidate(auth_token=auth_token)
+        self.user_id_cache.invalidate(auth_token)
+        self.forget_user(auth_token_or_user_id)
         file_id = self.at_translated_files.get(auth_token_or_user_id)
-        process = await self.exec_external_method(
-            c_set.at_simulation,
+        if self.process_pool.enabled:
+            # a spare process is swapped in right away, the old one is killed in the background
+            new_process_id = self.process_pool.take(c_set.at_simulation, file_id, auth_token)
+            if new_process_id is None:
+                new_process_id = await self.create_simulation_process(c_set.at_simulation, file_id, auth_token)
+            self.at_simulation_processes[auth_token_or_user_id] = new_process_id
+            self.process_pool.retire(c_set.at_simulation, process_id, auth_token)
+            return True
+
+        await self.kill_simulation_process(c_set.at_simulation, process_id, auth_token)
+        self.at_simulation_processes[auth_token_or_user_id] = await self.create_simulation_process(
+            c_set.at_simulation, file_id, auth_token
+        )
+        return True
+
+    async def create_simulation_process(self, component: str, file_id: str, auth_token: str) -> int | str:
+        process = await self.exec_component_method(
+            component,
             "create_process",
             {"process_name": "runtime_process", "file_id": file_id},
             auth_token=auth_token,
         )
-        self.at_simulation_processes[auth_token_or_user_id] = process.get("id")
-        return True
+        return process.get("id")
+
+    async def kill_simulation_process(self, component: str, process_id: int | str, auth_token: str):
+        await self.exec_component_method(component, "kill_process", {"process_id": process_id}, auth_token=auth_token)
 
     @authorized_method
     async def stop(self, auth_token_or_user_id: str = None):
         auth_token_or_user_id = auth_token_or_user_id or "default"
         self.stop_command[auth_token_or_user_id] = True
 
-    async def run_solvers(self, items, c_set: ComponentSet, auth_token: str, auth_token_or_user_id: str | int):
-        await self.exec_external_method(c_set.at_blackboard, "set_items", {"items": items}, auth_token=auth_token)
+    async def run_solvers(
+        self, items, c_set: ComponentSet, auth_token: str, auth_token_or_user_id: str | int, tact: int = None
+    ):
+        tracker = self.get_blackboard_tracker(auth_token_or_user_id)
+        if tracker is not None:
+            tracker.next_tact()
+
+        memoize_temporal = self.memo.enabled(c_set.at_temporal_solver)
+        memoize_solver = self.memo.enabled(c_set.at_solver)
+        # the simulation items are hashed before they are written, since in delta mode only a part of them is,
+        # together with the solver items of the previous tact (pending in batched mode), which are on the blackboard too
+        digest = None
+        if memoize_temporal or memoize_solver:
+            digest = self.memo.digest(items, self.solver_items.get(auth_token_or_user_id, []))
+
+        await self.set_blackboard_items(items, c_set, auth_token, auth_token_or_user_id)
 
-        temporal_result = await self.process_temporal_solver(auth_token=auth_token, auth_token_or_user_id=auth_token_or_user_id)
-        await self.debug("at_temporal_solver", temporal_result, auth_token)
+        temporal_result = None
+        if memoize_temporal:
+            temporal_result = self.memo.get(auth_token_or_user_id, c_set.at_temporal_solver, digest)
+        if temporal_result is None:
+            temporal_result = await self.process_temporal_solver(
+                auth_token=auth_token, auth_token_or_user_id=auth_token_or_user_id
+            )
+            if memoize_temporal:
+                self.memo.set(auth_token_or_user_id, c_set.at_temporal_solver, digest, temporal_result)
+        await self.debug("at_temporal_solver", temporal_result, auth_token, tact=tact)
         temporal_items = [{"ref": key, "value": value} for key, value in temporal_result.get("signified", {}).items()]
-        await self.exec_external_method(
-            c_set.at_blackboard, "set_items", {"items": temporal_items}, auth_token=auth_token
-        )
+        await self.set_blackboard_items(temporal_items, c_set, auth_token, auth_token_or_user_id)
 
-        solver_result = await self.process_solver(auth_token, auth_token_or_user_id=auth_token_or_user_id)
-        await self.debug("at_solver", solver_result, auth_token)
+        solver_result = None
+        if memoize_solver:
+            digest = self.memo.digest(digest, temporal_items)
+            solver_result = self.memo.get(auth_token_or_user_id, c_set.at_solver, digest)
+        if solver_result is None:
+            solver_result = await self.process_solver(auth_token, auth_token_or_user_id=auth_token_or_user_id)
+            if memoize_solver:
+                self.memo.set(auth_token_or_user_id, c_set.at_solver, digest, solver_result)
+        await self.debug("at_solver", solver_result, auth_token, tact=tact)
         solver_items = self._items_from_solver_result(solver_result)
-
-        await self.exec_external_method(
-            c_set.at_blackboard, "set_items", {"items": solver_items}, auth_token=auth_token
-        )
+        if digest is not None:
+            self.solver_items[auth_token_or_user_id] = solver_items
+        # nothing reads the solver items until the next tact, so in batched mode they
+        # are committed together with the next simulation items
+        await self.set_blackboard_items(solver_items, c_set, auth_token, auth_token_or_user_id, defer=True)
 
         return {"at_temporal_solver": temporal_result, "at_solver": solver_result}
 
+    async def fetch_tacts(
+        self,
+        tacts: asyncio.Queue,
+        slots: asyncio.Semaphore,
+        iterate: int,
+        wait: int,
+        auth_token: str,
+        auth_token_or_user_id: str | int,
+        pacer: TactPacer = None,
+    ):
+        try:
+            for tact in range(iterate):
+                await slots.acquire()
+                if self.get_stop_command(auth_token_or_user_id):
+                    break
+
+                schedule = None
+                started = time.perf_counter()
+                if pacer is not None:
+                    schedule = await pacer.wait()
+                    if self.get_stop_command(auth_token_or_user_id):
+                        break
+
+                tact_data = await self.process_simulation(
+                    auth_token=auth_token, auth_token_or_user_id=auth_token_or_user_id, ahead=iterate - tact
+                )
+                frame = self.get_resource_schema(auth_token_or_user_id).frame(tact_data.get("resources", []))
+                await self.debug("at_simulation", frame, auth_token, tact=tact)
+                tacts.put_nowait((tact, frame, frame, schedule, started))
+
+                if pacer is None and iterate > 1:
+                    await asyncio.sleep(wait / 1000)
+        finally:
+            # ticks fetched ahead are not valid for the next run, whether it was stopped or reset
+            self.prefetched_ticks.pop(auth_token_or_user_id, None)
+            tacts.put_nowait(None)
+
+    async def replay_tacts(
+        self,
+        tacts: asyncio.Queue,
+        slots: asyncio.Semaphore,
+        recorded: Iterable[tuple],
+        auth_token: str,
+        auth_token_or_user_id: str | int,
+    ):
+        try:
+            for tact, resource_parameters in recorded:
+                await slots.acquire()
+                if self.get_stop_command(auth_token_or_user_id):
+                    break
+                started = time.perf_counter()
+                await self.debug("at_simulation", resource_parameters, auth_token, tact=tact)
+                items = self._items_from_resource_parameters(resource_parameters)
+                tacts.put_nowait((tact, resource_parameters, items, None, started))
+        finally:
+            tacts.put_nowait(None)
+
+    def get_tact_sink(self, sink: str | Callable | None, auth_token: str) -> TactSink | None:
+        if sink is None or callable(sink):
+            return sink
+
+        async def push(tacts: List[dict]):
+            await self.exec_component_method(sink, "consume_tacts", {"tacts": tacts}, auth_token=auth_token)
+
+        return push
+
     @authorized_method
-    async def process_tact(self, iterate: int = 1, wait: int = 1000, auth_token: str = None):
-        loop = asyncio.get_event_loop()
+    async def process_tact(
+        self,
+        iterate: int = 1,
+        wait: int = 1000,
+        pipeline_depth: int = 1,
+        sink: str | Callable = None,
+        sink_chunk_size: int = 1,
+        keep_last: int = None,
+        schedule: str = SCHEDULE_DELAY,
+        overrun: str = OVERRUN_CATCH_UP,
+        fields: List[str] = None,
+        verbosity: str = VERBOSITY_FULL,
+        auth_token: str = None,
+    ):
+        if schedule not in SCHEDULES:
+            raise ValueError(f"Unknown tact schedule: {schedule}")
+        # the reply and the sink get only the selected stages and keys, the tact history is recorded in full
+        projection = get_projection(fields, verbosity)
+        # with the fixed_rate schedule tacts start every wait milliseconds regardless of how long they take,
+        # instead of waiting wait milliseconds after each of them
+        pacer = TactPacer(wait / 1000, overrun=overrun) if schedule == SCHEDULE_FIXED_RATE else None
 
-        result = []
         auth_token = auth_token or "default"
         auth_token_or_user_id = await self.get_user_id_or_token(auth_token, raize_on_failed=False)
-        self.stop_command[auth_token_or_user_id] = False
-        c_set = self.get_component_set(auth_token_or_user_id)
+        owner = self.route(auth_token_or_user_id)
+        if owner is not None and not callable(sink):
+            args = {
+                "iterate": iterate,
+                "wait": wait,
+                "pipeline_depth": pipeline_depth,
+                "sink": sink,
+                "sink_chunk_size": sink_chunk_size,
+                "keep_last": keep_last,
+                "schedule": schedule,
+                "overrun": overrun,
+                "fields": fields,
+                "verbosity": verbosity,
+            }
+            return await self.forward(owner, "process_tact", args, auth_token=auth_token)
+        with self.user_runs.run(auth_token_or_user_id):
+            self.stop_command[auth_token_or_user_id] = False
+            c_set = self.get_component_set(auth_token_or_user_id)
 
-        solvers_task = loop.create_future()
-        solvers_task.set_result(None)
-        previous_resource_parameters = None
+            # every finished tact is pushed to the sink (a component name or an async callable),
+            # keep_last bounds how many of them are also kept for the reply
+            result = TactResults(
+                keep_last=keep_last,
+                sink=self.get_tact_sink(sink, auth_token),
+                chunk_size=sink_chunk_size,
+                projection=projection,
+            )
 
-        for tact in range(iterate):
-            if self.get_stop_command(auth_token_or_user_id):
-                break
+            try:
+                async with self.admission.admit():
+                    with self.metrics.time(RUN_SECONDS, user=user_label(auth_token_or_user_id)):
+                        fetch = partial(
+                            self.fetch_tacts,
+                            iterate=iterate,
+                            wait=wait,
+                            auth_token=auth_token,
+                            auth_token_or_user_id=auth_token_or_user_id,
+                            pacer=pacer,
+                        )
+                        await self.run_tacts(result, c_set, fetch, pipeline_depth, auth_token, auth_token_or_user_id)
+            finally:
+                # the debugger is told the run is over however it ended
+                await self.debug("at_joint", {"stop": True}, auth_token, control=True)
+            return result.result()
 
-            tact_data = await self.process_simulation(auth_token=auth_token, auth_token_or_user_id=auth_token_or_user_id)
-            resources: List[ResourceMPDict] = tact_data.get("resources", [])
+    @authorized_method
+    async def replay(
+        self,
+        tacts: List[List[ResourceParameterType]] = None,
+        run: int = None,
+        start: int = 0,
+        end: int = None,
+        pipeline_depth: int = 1,
+        sink: str | Callable = None,
+        sink_chunk_size: int = 1,
+        keep_last: int = None,
+        fields: List[str] = None,
+        verbosity: str = VERBOSITY_FULL,
+        auth_token: str = None,
+    ):
+        # feeds recorded simulation tacts (given as resource_parameters or a run of the tact history)
+        # to the solvers without running the simulation and without pacing
+        if (tacts is None) == (run is None):
+            raise ValueError('Expected either "tacts" or "run" provided')
+        if run is not None and self.history is None:
+            raise ValueError("Tact history is not enabled")
+        projection = get_projection(fields, verbosity)
 
-            resource_parameters: List[ResourceParameterType] = [
-                {
-                    "name": resource["resource_name"],
-                    "parameters": {key: value for key, value in resource.items() if key != "resource_name"},
-                }
-                for resource in resources
-            ]
-            await self.debug("at_simulation", resource_parameters, auth_token)
-            items = self._items_from_resource_parameters(resource_parameters)
-
-            await solvers_task
-
-            if solvers_task.result() is not None:
-                result.append(
-                    {
-                        "tact": tact,
-                        "at_simulation": previous_resource_parameters,
-                        **solvers_task.result(),
-                        # 'at_temporal_solver': temporal_result,
-                        # 'at_solver': solver_result
-                    }
-                )
+        auth_token = auth_token or "default"
+        auth_token_or_user_id = await self.get_user_id_or_token(auth_token, raize_on_failed=False)
+        owner = self.route(auth_token_or_user_id)
+        if owner is not None and not callable(sink):
+            args = {
+                "tacts": tacts,
+                "run": run,
+                "start": start,
+                "end": end,
+                "pipeline_depth": pipeline_depth,
+                "sink": sink,
+                "sink_chunk_size": sink_chunk_size,
+                "keep_last": keep_last,
+                "fields": fields,
+                "verbosity": verbosity,
+            }
+            return await self.forward(owner, "replay", args, auth_token=auth_token)
+        with self.user_runs.run(auth_token_or_user_id):
+            self.stop_command[auth_token_or_user_id] = False
+            c_set = self.get_component_set(auth_token_or_user_id)
 
-            previous_resource_parameters = resource_parameters
+            if tacts is not None:
+                recorded = list(enumerate(tacts))[start:end]
+            else:
+                history = self.history.get(auth_token_or_user_id)
+                records = history.iter_run(run, start=start, end=end, stages=["at_simulation"])
+                recorded = ((record["tact"], record["at_simulation"]) for record in records)
 
-            solvers_task = loop.create_task(self.run_solvers(items, c_set, auth_token=auth_token, auth_token_or_user_id=auth_token_or_user_id))
+            result = TactResults(
+                keep_last=keep_last,
+                sink=self.get_tact_sink(sink, auth_token),
+                chunk_size=sink_chunk_size,
+                projection=projection,
+            )
 
-            if iterate > 1:
-                await asyncio.sleep(wait / 1000)
+            try:
+                async with self.admission.admit():
+                    with self.metrics.time(RUN_SECONDS, user=user_label(auth_token_or_user_id)):
+                        fetch = partial(
+                            self.replay_tacts,
+                            recorded=recorded,
+                            auth_token=auth_token,
+                            auth_token_or_user_id=auth_token_or_user_id,
+                        )
+                        await self.run_tacts(result, c_set, fetch, pipeline_depth, auth_token, auth_token_or_user_id)
+            finally:
+                # the debugger is told the run is over however it ended
+                await self.debug("at_joint", {"stop": True}, auth_token, control=True)
+            return result.result()
 
-        await solvers_task
-        result.append(
-            {
-                "tact": tact,
-                "at_simulation": previous_resource_parameters,
-                **solvers_task.result(),
-                # 'at_temporal_solver': temporal_result,
-                # 'at_solver': solver_result
+    @authorized_method
+    async def sweep(
+        self,
+        runs: List[dict],
+        iterate: int = 1,
+        wait: int = 0,
+        pipeline_depth: int = 1,
+        parallelism: int = 2,
+        sink: str | Callable = None,
+        sink_chunk_size: int = 1,
+        keep_last: int = None,
+        auth_token: str = None,
+    ) -> List[dict]:
+        # every run gets a simulation process of its own ("file_id", the configured model by default) and may
+        # override the components of the user; runs sharing a solver or blackboard run one after another, so
+        # parallelism only matters for runs that override them
+        auth_token = auth_token or "default"
+        auth_token_or_user_id = await self.get_user_id_or_token(auth_token, raize_on_failed=False)
+        owner = self.route(auth_token_or_user_id)
+        if owner is not None and not callable(sink):
+            args = {
+                "runs": runs,
+                "iterate": iterate,
+                "wait": wait,
+                "pipeline_depth": pipeline_depth,
+                "parallelism": parallelism,
+                "sink": sink,
+                "sink_chunk_size": sink_chunk_size,
+                "keep_last": keep_last,
             }
+            return await self.forward(owner, "sweep", args, auth_token=auth_token)
+        for run in runs:
+            unknown = set(run) - set(SWEEP_COMPONENTS) - {"file_id", "name"}
+            if unknown:
+                raise ValueError(f"Unknown sweep run options: {', '.join(sorted(unknown))}")
+        with self.user_runs.run(auth_token_or_user_id, sweep=True):
+            self.stop_command[auth_token_or_user_id] = False
+            c_set = self.get_component_set(auth_token_or_user_id)
+            tact_sink = self.get_tact_sink(sink, auth_token)
+
+            slots = asyncio.Semaphore(max(parallelism, 1))
+            locks: Dict[str, asyncio.Lock] = {}
+
+            async def run_one(index: int, run: dict) -> dict:
+                run_set = ComponentSet(
+                    **{**asdict(c_set), **{key: run[key] for key in SWEEP_COMPONENTS if run.get(key)}}
+                )
+                shared = sorted({run_set.at_solver, run_set.at_temporal_solver, run_set.at_blackboard})
+                async with AsyncExitStack() as stack:
+                    # locks are always taken in the same order, so runs waiting for each other cannot deadlock
+                    for component in shared:
+                        await stack.enter_async_context(locks.setdefault(component, asyncio.Lock()))
+                    await stack.enter_async_context(slots)
+                    summary = {"run": index, "name": run.get("name"), **asdict(run_set)}
+                    try:
+                        summary.update(
+                            await self.run_sweep(
+                                index,
+                                run,
+                                run_set,
+                                iterate,
+                                wait,
+                                pipeline_depth,
+                                tact_sink,
+                                sink_chunk_size,
+                                keep_last,
+                                auth_token,
+                                auth_token_or_user_id,
+                            )
+                        )
+                    except Exception as e:
+                        summary["error"] = str(e)
+                    return summary
+
+            try:
+                async with self.admission.admit():
+                    with self.metrics.time(RUN_SECONDS, user=user_label(auth_token_or_user_id)):
+                        result = await asyncio.gather(*(run_one(index, run) for index, run in enumerate(runs)))
+            finally:
+                # the runs reset and wrote to the components of the user, so nothing kept for them is valid anymore
+                self.forget_user(auth_token_or_user_id)
+                await self.debug("at_joint", {"stop": True}, auth_token, control=True)
+            return list(result)
+
+    async def run_sweep(
+        self,
+        index: int,
+        run: dict,
+        c_set: ComponentSet,
+        iterate: int,
+        wait: int,
+        pipeline_depth: int,
+        sink: TactSink | None,
+        sink_chunk_size: int,
+        keep_last: int | None,
+        auth_token: str,
+        auth_token_or_user_id: str | int,
+    ) -> dict:
+        run_key = f"{auth_token_or_user_id}#sweep-{index}"
+        file_id = run.get("file_id") or self.at_translated_files.get(auth_token_or_user_id)
+
+        # every run starts from empty solvers and, where it can be reset, an empty blackboard
+        for solver in (c_set.at_temporal_solver, c_set.at_solver):
+            if await self.is_component_ready(solver, auth_token=auth_token):
+                await self.exec_component_method(solver, "reset", {}, auth_token=auth_token)
+        await self.reset_blackboard(c_set.at_blackboard, auth_token)
+
+        process_id = self.process_pool.take(c_set.at_simulation, file_id, auth_token)
+        if process_id is None:
+            process_id = await self.create_simulation_process(c_set.at_simulation, file_id, auth_token)
+        self.component_sets[run_key] = c_set
+        self.at_simulation_processes[run_key] = process_id
+        self.stop_command[run_key] = False
+        self.run_parents[run_key] = auth_token_or_user_id
+
+        async def push_run(tacts: List[dict]):
+            await sink([{**tact, "run": index} for tact in tacts])
+
+        result = TactResults(
+            keep_last=keep_last, sink=push_run if sink is not None else None, chunk_size=sink_chunk_size
         )
+        try:
+            fetch = partial(
+                self.fetch_tacts, iterate=iterate, wait=wait, auth_token=auth_token, auth_token_or_user_id=run_key
+            )
+            await self.run_tacts(result, c_set, fetch, pipeline_depth, auth_token, run_key, record=False)
+        finally:
+            if self.process_pool.enabled:
+                self.process_pool.retire(c_set.at_simulation, process_id, auth_token)
+            else:
+                await self.kill_simulation_process(c_set.at_simulation, process_id, auth_token)
+            for state in (self.component_sets, self.at_simulation_processes, self.stop_command, self.run_parents):
+                state.pop(run_key, None)
+            self.forget_user(run_key)
+        return {"file_id": file_id, "total": result.total, "tacts": result.result()}
+
+    async def reset_blackboard(self, component: str, auth_token: str):
+        # reset is not part of every blackboard, without it a sweep run sees the items of the previous run
+        # that it does not write itself
+        if component in self.reset_unsupported or not await self.is_component_ready(component, auth_token=auth_token):
+            return
+        try:
+            await self.exec_component_method(component, "reset", {}, auth_token=auth_token)
+        except (asyncio.TimeoutError, TimeoutError, ConnectionError):
+            raise
+        except Exception:
+            logger.warning("%s does not support reset, sweep runs share its items", component, exc_info=True)
+            self.reset_unsupported.add(component)
 
-        await self.debug("at_joint", {"stop": True}, auth_token)
-        return result
+    async def run_tacts(
+        self,
+        result: TactResults,
+        c_set: ComponentSet,
+        fetch: Callable[[asyncio.Queue, asyncio.Semaphore], Awaitable],
+        pipeline_depth: int,
+        auth_token: str,
+        auth_token_or_user_id: str | int,
+        record: bool = True,
+    ):
+        loop = asyncio.get_event_loop()
+        user = user_label(auth_token_or_user_id)
+        history = self.history.get(auth_token_or_user_id) if self.history is not None and record else None
+        run = history.next_run() if history is not None else None
+
+        # pipeline_depth is the number of simulation ticks that may be fetched ahead of the solvers,
+        # with 0 the next tick is fetched only after the solvers are done with the previous one
+        tacts = asyncio.Queue()
+        slots = asyncio.Semaphore(max(pipeline_depth, 1))
+        fetcher = loop.create_task(fetch(tacts, slots))
+
+        try:
+            try:
+                while (fetched := await tacts.get()) is not None:
+                    tact, simulation, items, tact_schedule, started = fetched
+                    self.metrics.set(PIPELINE_QUEUE_DEPTH, tacts.qsize(), user=user)
+                    if pipeline_depth > 0:
+                        slots.release()
+                    async with self.fair_scheduler.turn(auth_token_or_user_id):
+                        with self.metrics.time(STAGE_SECONDS, stage="run_solvers", component=AT_JOINT, user=user):
+                            solvers_result = await self.run_solvers(
+                                items,
+                                c_set,
+                                auth_token=auth_token,
+                                auth_token_or_user_id=auth_token_or_user_id,
+                                tact=tact,
+                            )
+                    self.metrics.observe(TACT_SECONDS, time.perf_counter() - started, user=user)
+                    if pipeline_depth <= 0:
+                        slots.release()
+                    entry = {"tact": tact, "at_simulation": simulation, **solvers_result}
+                    if tact_schedule is not None:
+                        entry["schedule"] = tact_schedule
+                    await result.append(entry)
+                    if history is not None:
+                        # encoding and writing the record would hold up the event loop for every other run
+                        await asyncio.to_thread(history.append, tact, materialize(entry), run)
+            finally:
+                if not fetcher.done():
+                    fetcher.cancel()
+            await fetcher
+            await result.close()
+
+            await self.flush_blackboard_items(c_set, auth_token, auth_token_or_user_id)
+        finally:
+            result.cancel()
+            self.drop_blackboard_items(auth_token_or_user_id)
+
+    @authorized_method
+    async def get_status_cache_stats(self, auth_token: str = None) -> dict:
+        return self.status_cache.stats()
+
+    @authorized_method
+    async def get_memo_stats(self, auth_token: str = None) -> dict:
+        return self.memo.stats()
+
+    @authorized_method
+    async def get_process_pool_stats(self, auth_token: str = None) -> dict:
+        return self.process_pool.stats()
+
+    @authorized_method
+    async def get_user_id_cache_stats(self, auth_token: str = None) -> dict:
+        return self.user_id_cache.stats()
+
+    @authorized_method
+    async def invalidate_user_id(self, token: str = None, auth_token: str = None) -> bool:
+        # drops the cached user id of token, or of every token when it is not provided
+        self.user_id_cache.invalidate(token)
+        return True
+
+    @authorized_method
+    async def get_blackboard_delta_stats(self, auth_token: str = None) -> dict:
+        auth_token = auth_token or "default"
+        auth_token_or_user_id = await self.get_user_id_or_token(auth_token, raize_on_failed=False)
+        owner = self.route(auth_token_or_user_id)
+        if owner is not None:
+            return await self.forward(owner, "get_blackboard_delta_stats", {}, auth_token=auth_token)
+        tracker = self.blackboard_trackers.get(auth_token_or_user_id)
+        return {"enabled": self.blackboard_delta, **(tracker.stats() if tracker is not None else {})}
+
+    @authorized_method
+    async def get_history(
+        self,
+        start: int = 0,
+        end: int = None,
+        stages: List[str] = None,
+        limit: int = 100,
+        run: int = None,
+        auth_token: str = None,
+    ) -> dict:
+        if self.history is None:
+            raise ValueError("Tact history is not enabled")
+        auth_token = auth_token or "default"
+        auth_token_or_user_id = await self.get_user_id_or_token(auth_token, raize_on_failed=False)
+        owner = self.route(auth_token_or_user_id)
+        if owner is not None:
+            args = {"start": start, "end": end, "stages": stages, "limit": limit, "run": run}
+            return await self.forward(owner, "get_history", args, auth_token=auth_token)
+        return self.history.query(auth_token_or_user_id, start=start, end=end, stages=stages, limit=limit, run=run)
+
+    @authorized_method
+    async def get_debug_stats(self, auth_token: str = None) -> dict:
+        return self.debug_publisher.stats()
+
+    @authorized_method
+    async def get_scheduler_stats(self, auth_token: str = None) -> dict:
+        return {
+            "components": self.component_limiter.stats(),
+            "tacts": self.fair_scheduler.stats(),
+            "runs": self.admission.stats(),
+        }
+
+    def collect_metrics(self):
+        cache = self.status_cache.stats()
+        yield "at_joint_status_cache_hits_total", COUNTER, {}, cache["hits"]
+        yield "at_joint_status_cache_misses_total", COUNTER, {}, cache["misses"]
+        user_ids = self.user_id_cache.stats()
+        yield "at_joint_user_id_cache_hits_total", COUNTER, {}, user_ids["hits"]
+        yield "at_joint_user_id_cache_misses_total", COUNTER, {}, user_ids["misses"]
+        yield "at_joint_user_id_cache_evictions_total", COUNTER, {}, user_ids["evictions"]
+        yield "at_joint_user_id_cache_size", GAUGE, {}, user_ids["size"]
+        pool = self.process_pool.stats()
+        yield "at_joint_process_pool_spares", GAUGE, {}, pool["spares"]
+        yield "at_joint_process_pool_hits_total", COUNTER, {}, pool["hits"]
+        yield "at_joint_process_pool_misses_total", COUNTER, {}, pool["misses"]
+        yield "at_joint_process_pool_expired_total", COUNTER, {}, pool["expired"]
+        memo = self.memo.stats()
+        for component, skipped in memo["skipped"].items():
+            yield "at_joint_memo_skipped_total", COUNTER, {"component": component}, skipped
+        for component, computed in memo["computed"].items():
+            yield "at_joint_memo_computed_total", COUNTER, {"component": component}, computed
+
+        debug = self.debug_publisher.stats()
+        yield "at_joint_debug_queue_depth", GAUGE, {}, debug["queue_depth"]
+        for counter in ("published", "dropped", "coalesced", "sampled_out", "failed"):
+            yield f"at_joint_debug_{counter}_total", COUNTER, {}, debug[counter]
+
+        for component, inflight in self.component_limiter.inflight.items():
+            yield "at_joint_component_inflight", GAUGE, {"component": component}, inflight
+        for user, waiting in self.fair_scheduler.waiting().items():
+            yield "at_joint_tact_slot_waiting", GAUGE, {"user": user_label(user)}, waiting
+        runs = self.admission.stats()
+        yield "at_joint_runs", GAUGE, {}, runs["running"]
+        yield "at_joint_runs_queued", GAUGE, {}, runs["queued"]
+        yield "at_joint_runs_rejected_total", COUNTER, {}, runs["rejected"]
+
+        for auth_token_or_user_id, tracker in self.blackboard_trackers.items():
+            user = user_label(auth_token_or_user_id)
+            yield "at_joint_blackboard_delta_sent_total", COUNTER, {"user": user}, tracker.sent
+            yield "at_joint_blackboard_delta_skipped_total", COUNTER, {"user": user}, tracker.skipped
+
+    @authorized_method
+    async def get_metrics(self, fmt: str = "prometheus", auth_token: str = None) -> str | dict:
+        if fmt == "json":
+            return self.metrics.snapshot()
+        # several workers are scraped together, so their samples are told apart by a worker label
+        return self.metrics.render(labels={"worker": self.worker_name} if self.state.shared else None)
+
+    @authorized_method
+    async def get_workers(self, auth_token: str = None) -> List[str]:
+        if not self.state.shared:
+            return [self.worker_name]
+        return sorted(set(self.live_workers()) | {self.worker_name})
 
     @authorized_method
     async def get_config(self, auth_token: str) -> dict:
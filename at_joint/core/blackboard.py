@@ -0,0 +1,71 @@
+from typing import Any
+from typing import Dict
+from typing import List
+
+from at_joint.core.columnar import ResourceFrame
+
+
+def same_value(old: Any, new: Any) -> bool:
+    # 1 == True and 0 == 0.0, but a change of type is still a change for the blackboard
+    if type(old) is not type(new):
+        return False
+    if isinstance(new, dict):
+        return old.keys() == new.keys() and all(same_value(old[key], value) for key, value in new.items())
+    if isinstance(new, (list, tuple)):
+        return len(old) == len(new) and all(same_value(a, b) for a, b in zip(old, new))
+    return old == new
+
+
+class BlackboardDeltaTracker:
+    resync_interval: int
+    written: Dict[str, dict]
+    tacts: int
+    sent: int
+    skipped: int
+
+    def __init__(self, resync_interval: int = 100):
+        self.resync_interval = resync_interval
+        self.written = {}
+        self.tacts = 0
+        self.sent = 0
+        self.skipped = 0
+
+    def next_tact(self):
+        self.tacts += 1
+        if self.resync_interval > 0 and self.tacts % self.resync_interval == 0:
+            self.written.clear()
+
+    def changed(self, items: List[dict]) -> List[dict]:
+        result = []
+        for item in items:
+            ref = item["ref"]
+            written = self.written.get(ref)
+            if written is None or not same_value(written, item):
+                self.written[ref] = item
+                result.append(item)
+        self.sent += len(result)
+        self.skipped += len(items) - len(result)
+        return result
+
+    def changed_frame(self, frame: ResourceFrame) -> List[dict]:
+        result = []
+        written = self.written
+        for ref, value in zip(frame.refs(), frame.values):
+            item = written.get(ref)
+            if item is None or len(item) != 2 or not same_value(item["value"], value):
+                item = written[ref] = {"ref": ref, "value": value}
+                result.append(item)
+        self.sent += len(result)
+        self.skipped += len(frame) - len(result)
+        return result
+
+    def forget(self):
+        self.written.clear()
+
+    def stats(self) -> dict:
+        return {
+            "refs": len(self.written),
+            "tacts": self.tacts,
+            "sent": self.sent,
+            "skipped": self.skipped,
+        }
@@ -0,0 +1,113 @@
+import time
+from collections import OrderedDict
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+
+
+REGISTERED = "registered"
+CONFIGURED = "configured"
+
+
+class StatusCache:
+    ttl: float
+    hits: int
+    misses: int
+
+    def __init__(self, ttl: float = 5.0):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple[str, str, Optional[str]], Tuple[float, bool]] = {}
+
+    def get(self, kind: str, component: str, auth_token: str = None) -> Optional[bool]:
+        entry = self._entries.get((kind, component, auth_token))
+        if entry is None or entry[0] <= time.monotonic():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1]
+
+    def set(self, kind: str, component: str, value: bool, auth_token: str = None):
+        if self.ttl <= 0:
+            return
+        self._entries[(kind, component, auth_token)] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, component: str = None, auth_token: str = None, kind: str = None):
+        for key in list(self._entries):
+            key_kind, key_component, key_auth_token = key
+            if kind is not None and key_kind != kind:
+                continue
+            if component is not None and key_component != component:
+                continue
+            if auth_token is not None and key_auth_token != auth_token:
+                continue
+            self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "ttl": self.ttl,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+class UserIdCache:
+    ttl: float
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+
+    def __init__(self, ttl: float = 60.0, max_size: int = 1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+
+    def get(self, auth_token: str) -> Optional[Any]:
+        entry = self._entries.get(auth_token)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[auth_token]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(auth_token)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, auth_token: str, user_id: Any):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        self._entries[auth_token] = (time.monotonic() + self.ttl, user_id)
+        self._entries.move_to_end(auth_token)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, auth_token: str = None):
+        if auth_token is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(auth_token, None)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "ttl": self.ttl,
+            "max_size": self.max_size,
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,79 @@
+import sys
+from array import array
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+
+class ResourceSchema:
+    refs: List[str]
+    parameters: List[str]
+
+    def __init__(self):
+        self.columns: Dict[str, Dict[str, int]] = {}
+        self.refs = []
+        self.parameters = []
+
+    def column(self, resource_name: str, parameter: str) -> int:
+        resource = self.columns.get(resource_name)
+        if resource is None:
+            resource = self.columns[resource_name] = {}
+        column = resource.get(parameter)
+        if column is None:
+            column = resource[parameter] = len(self.refs)
+            self.refs.append(sys.intern(resource_name + "." + parameter))
+            self.parameters.append(sys.intern(parameter))
+        return column
+
+    def frame(self, resources: List[dict]) -> "ResourceFrame":
+        frame = ResourceFrame(self)
+        columns, values, spans = frame.columns, frame.values, frame.resources
+        for resource in resources:
+            resource_name = resource["resource_name"]
+            known = self.columns.get(resource_name, {})
+            start = len(values)
+            for parameter, value in resource.items():
+                if parameter == "resource_name":
+                    continue
+                column = known.get(parameter)
+                if column is None:
+                    column = self.column(resource_name, parameter)
+                    known = self.columns[resource_name]
+                columns.append(column)
+                values.append(value)
+            spans.append((resource_name, start, len(values)))
+        return frame
+
+
+class ResourceFrame:
+    schema: ResourceSchema
+    columns: array
+    values: List[Any]
+    resources: List[Tuple[str, int, int]]
+
+    def __init__(self, schema: ResourceSchema):
+        self.schema = schema
+        self.columns = array("I")
+        self.values = []
+        self.resources = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def refs(self):
+        refs = self.schema.refs
+        return (refs[column] for column in self.columns)
+
+    def to_items(self) -> List[dict]:
+        return [{"ref": ref, "value": value} for ref, value in zip(self.refs(), self.values)]
+
+    def to_resource_parameters(self) -> List[dict]:
+        parameters, columns, values = self.schema.parameters, self.columns, self.values
+        return [
+            {
+                "name": resource_name,
+                "parameters": {parameters[columns[index]]: values[index] for index in range(start, end)},
+            }
+            for resource_name, start, end in self.resources
+        ]
@@ -0,0 +1,154 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable
+from typing import Callable
+from typing import Optional
+from typing import Set
+
+
+logger = logging.getLogger(__name__)
+
+DROP_OLDEST = "drop_oldest"
+DROP_NEWEST = "drop_newest"
+COALESCE = "coalesce"
+
+OVERFLOW_POLICIES = (DROP_OLDEST, DROP_NEWEST, COALESCE)
+
+
+DebugSend = Callable[[str, dict, str], Awaitable]
+
+
+class DebugPublisher:
+    max_size: int
+    max_control: int
+    overflow: str
+    sample_every: int
+
+    def __init__(
+        self,
+        send: DebugSend,
+        max_size: int = 100,
+        overflow: str = DROP_OLDEST,
+        sample_every: int = 1,
+        max_control: int = 16,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown debug overflow policy: {overflow}")
+        self.send = send
+        self.max_size = max(max_size, 1)
+        self.max_control = max(max_control, 1)
+        self.overflow = overflow
+        self.sample_every = max(sample_every, 1)
+        self.published = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.sampled_out = 0
+        self.failed = 0
+        self._pending: OrderedDict = OrderedDict()
+        self._control: Set[int] = set()
+        self._sending = False
+        self._keys = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self, initiator: str, data: dict, auth_token: str, tact: int = None, control: bool = False):
+        # control messages (the stop of a run) are never sampled out or coalesced, and have a cap of their own,
+        # so only a backlog of more than max_control of them drops the oldest one
+        if control:
+            if len(self._control) >= self.max_control:
+                self.dropped += 1
+                oldest = next(key for key in self._pending if key in self._control)
+                del self._pending[oldest]
+                self._control.discard(oldest)
+                logger.warning("Dropping a debug control message, %s are queued", self.max_control)
+            key = next(self._keys)
+            self._control.add(key)
+            self._enqueue(key, (initiator, data, auth_token))
+            return
+
+        if tact is not None and tact % self.sample_every:
+            self.sampled_out += 1
+            return
+
+        message = (initiator, data, auth_token)
+        if self.overflow == COALESCE:
+            key = (auth_token, initiator)
+            if key in self._pending:
+                self._pending[key] = message
+                self.coalesced += 1
+                return
+        else:
+            key = next(self._keys)
+
+        if len(self._pending) - len(self._control) >= self.max_size:
+            self.dropped += 1
+            if self.overflow == DROP_NEWEST:
+                return
+            self._evict()
+
+        self._enqueue(key, message)
+
+    def _enqueue(self, key, message: tuple):
+        self._pending[key] = message
+        self._ensure_running()
+        self._wakeup.set()
+
+    def _evict(self):
+        for key in self._pending:
+            if key not in self._control:
+                del self._pending[key]
+                return
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_event_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            while not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            key, (initiator, data, auth_token) = self._pending.popitem(last=False)
+            self._control.discard(key)
+            self._sending = True
+            try:
+                await self.send(initiator, data, auth_token)
+                self.published += 1
+            except Exception:
+                self.failed += 1
+                logger.exception("Failed to publish debug message from %s", initiator)
+            finally:
+                self._sending = False
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def close(self, timeout: float = 5.0):
+        # what is queued still goes out on shutdown, for at most timeout seconds
+        deadline = time.monotonic() + timeout
+        while self._task is not None and not self._task.done() and (self._pending or self._sending):
+            if time.monotonic() >= deadline:
+                logger.warning("Dropping %s debug messages on shutdown", len(self._pending))
+                break
+            await asyncio.sleep(0.01)
+        self.stop()
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": len(self._pending),
+            "max_size": self.max_size,
+            "max_control": self.max_control,
+            "overflow": self.overflow,
+            "sample_every": self.sample_every,
+            "published": self.published,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "sampled_out": self.sampled_out,
+            "failed": self.failed,
+        }
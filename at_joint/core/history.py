@@ -0,0 +1,213 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+from array import array
+from typing import Dict
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+
+
+STAGES = ("at_simulation", "at_temporal_solver", "at_solver")
+
+# run, tact, offset of the record in the data file, record length
+INDEX_ENTRY = struct.Struct("<IIQI")
+STAGE_LENGTH = struct.Struct("<I")
+
+MAX_PAGE_SIZE = 1000
+
+
+def history_name(auth_token_or_user_id: str | int) -> str:
+    # the short user_label of the metrics may collide, a history directory must not be shared by two users,
+    # and tokens never end up in file names as they are
+    if auth_token_or_user_id is None or isinstance(auth_token_or_user_id, int):
+        return str(auth_token_or_user_id or "default")
+    if auth_token_or_user_id == "default":
+        return auth_token_or_user_id
+    return "token-" + hashlib.sha256(auth_token_or_user_id.encode()).hexdigest()
+
+
+class TactHistory:
+    directory: str
+    run: int
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._data = open(os.path.join(directory, "tacts.data"), "a+b")
+        self._index = open(os.path.join(directory, "tacts.index"), "a+b")
+        # a record is written before its index entry, so a torn index entry is the only thing to drop
+        size = self._index.tell()
+        if size % INDEX_ENTRY.size:
+            self._index.truncate(size - size % INDEX_ENTRY.size)
+            self._index.seek(0, os.SEEK_END)
+        # records are appended from a worker thread, readers only look at what the sizes already cover
+        self._lock = threading.Lock()
+        self._size = self._index.tell() // INDEX_ENTRY.size
+        self._data_size = self._data.tell()
+        self._data_map: Optional[mmap.mmap] = None
+        self._index_map: Optional[mmap.mmap] = None
+        # concurrent runs interleave their records, so the positions of every run are kept apart
+        self._runs: Dict[int, array] = {}
+        for position in range(self._size):
+            self._runs.setdefault(self._entry(position)[0], array("I")).append(position)
+        self.run = max(self._runs, default=0)
+
+    def __len__(self):
+        return self._size
+
+    def next_run(self) -> int:
+        self.run += 1
+        return self.run
+
+    def append(self, tact: int, entry: dict, run: int = None):
+        run = run if run is not None else self.run
+        record = bytearray()
+        for stage in STAGES:
+            data = json.dumps(entry.get(stage), default=str, separators=(",", ":")).encode()
+            record += STAGE_LENGTH.pack(len(data))
+            record += data
+        with self._lock:
+            offset = self._data.tell()
+            self._data.write(record)
+            self._data.flush()
+            self._data_size = offset + len(record)
+            self._index.write(INDEX_ENTRY.pack(run, tact, offset, len(record)))
+            self._index.flush()
+            self._runs.setdefault(run, array("I")).append(self._size)
+            self._size += 1
+
+    def _map(self, current: Optional[mmap.mmap], file, size: int) -> Optional[mmap.mmap]:
+        if current is not None and len(current) >= size:
+            return current
+        if current is not None:
+            current.close()
+        if size == 0:
+            return None
+        return mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ)
+
+    def _entry(self, position: int):
+        self._index_map = self._map(self._index_map, self._index, self._size * INDEX_ENTRY.size)
+        return INDEX_ENTRY.unpack_from(self._index_map, position * INDEX_ENTRY.size)
+
+    def tact(self, position: int) -> int:
+        return self._entry(position)[1]
+
+    def run_positions(self, run: int) -> array:
+        return self._runs.get(run, array("I"))
+
+    def read(self, start: int = 0, end: int = None, stages: Iterable[str] = None) -> List[dict]:
+        end = len(self) if end is None else min(end, len(self))
+        return self.read_positions(range(start, end), stages=stages)
+
+    def read_positions(self, positions: Iterable[int], stages: Iterable[str] = None) -> List[dict]:
+        stages = set(STAGES if not stages else stages)
+        records = []
+        for position in positions:
+            run, tact, offset, length = self._entry(position)
+            self._data_map = self._map(self._data_map, self._data, self._data_size)
+            record = {"position": position, "run": run, "tact": tact}
+            # stages that are not requested are skipped without decoding them
+            for stage in STAGES:
+                (size,) = STAGE_LENGTH.unpack_from(self._data_map, offset)
+                offset += STAGE_LENGTH.size
+                if stage in stages:
+                    record[stage] = json.loads(self._data_map[offset : offset + size])
+                offset += size
+            records.append(record)
+        return records
+
+    def run_slice(self, run: int, start: int = 0, end: int = None) -> array:
+        # start and end are tact numbers, which a run records in increasing order but not always from 0
+        positions = self.run_positions(run)
+        first = self._bisect_tact(positions, start)
+        last = len(positions) if end is None else self._bisect_tact(positions, end)
+        return positions[first:last]
+
+    def _bisect_tact(self, positions: array, tact: int) -> int:
+        low, high = 0, len(positions)
+        while low < high:
+            middle = (low + high) // 2
+            if self.tact(positions[middle]) < tact:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def iter_run(
+        self, run: int, start: int = 0, end: int = None, stages: Iterable[str] = None, chunk_size: int = 100
+    ) -> Iterator[dict]:
+        positions = self.run_slice(run, start, end)
+        for chunk in range(0, len(positions), chunk_size):
+            yield from self.read_positions(positions[chunk : chunk + chunk_size], stages=stages)
+
+    def close(self):
+        with self._lock:
+            for mapped in (self._data_map, self._index_map):
+                if mapped is not None:
+                    mapped.close()
+            self._data_map = self._index_map = None
+            self._data.close()
+            self._index.close()
+
+
+class HistoryStore:
+    directory: str
+    histories: Dict[str, TactHistory]
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.histories = {}
+
+    def get(self, auth_token_or_user_id: str | int) -> TactHistory:
+        name = history_name(auth_token_or_user_id)
+        history = self.histories.get(name)
+        if history is None:
+            history = self.histories[name] = TactHistory(os.path.join(self.directory, name))
+        return history
+
+    def query(
+        self,
+        auth_token_or_user_id: str | int,
+        start: int = 0,
+        end: int = None,
+        stages: Iterable[str] = None,
+        limit: int = 100,
+        run: int = None,
+    ) -> dict:
+        for stage in stages or ():
+            if stage not in STAGES:
+                raise ValueError(f"Unknown stage: {stage}")
+        if limit <= 0 or limit > MAX_PAGE_SIZE:
+            raise ValueError(f"limit should be between 1 and {MAX_PAGE_SIZE}")
+        history = self.get(auth_token_or_user_id)
+        if run is None:
+            # start and end are positions in the history
+            total = len(history)
+            start = max(start, 0)
+            end = total if end is None else min(end, total)
+            page_end = min(end, start + limit)
+            return {
+                "total": total,
+                "run": history.run,
+                "records": history.read(start, page_end, stages=stages),
+                "next": page_end if page_end < end else None,
+            }
+        # start and end are tact numbers of the run
+        positions = history.run_slice(run, start, end)
+        records = history.read_positions(positions[:limit], stages=stages)
+        return {
+            "total": len(history.run_positions(run)),
+            "run": history.run,
+            "records": records,
+            "next": history.tact(positions[limit]) if len(positions) > limit else None,
+        }
+
+    def close(self):
+        for history in self.histories.values():
+            history.close()
+        self.histories.clear()
@@ -0,0 +1,73 @@
+import copy
+import hashlib
+import json
+from collections import OrderedDict
+from typing import Any
+from typing import Dict
+from typing import Hashable
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+
+from at_joint.core.columnar import ResourceFrame
+
+
+class StageMemo:
+    components: frozenset
+    max_size: int
+
+    def __init__(self, components: Iterable[str] = (), max_size: int = 256):
+        # only components declared time-independent are memoized: the same blackboard inputs give the same result
+        self.components = frozenset(components or ())
+        self.max_size = max_size
+        self._entries: OrderedDict[Tuple, Any] = OrderedDict()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    def enabled(self, component: str) -> bool:
+        return component in self.components and self.max_size > 0
+
+    @staticmethod
+    def digest(*inputs) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for value in inputs:
+            if isinstance(value, ResourceFrame):
+                # column ids are stable for the schema of a user, so they stand for the refs
+                digest.update(value.columns.tobytes())
+                value = value.values
+            digest.update(json.dumps(value, default=str, separators=(",", ":")).encode())
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, user: Hashable, component: str, digest: str) -> Optional[Any]:
+        key = (user, component, digest)
+        result = self._entries.get(key)
+        if result is None:
+            self.misses[component] = self.misses.get(component, 0) + 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits[component] = self.hits.get(component, 0) + 1
+        # results are handed to debug, sinks and projections, which must not change the cached one
+        return copy.deepcopy(result)
+
+    def set(self, user: Hashable, component: str, digest: str, result: Any):
+        self._entries[(user, component, digest)] = copy.deepcopy(result)
+        self._entries.move_to_end((user, component, digest))
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def forget(self, user: Hashable = None):
+        if user is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[0] == user]:
+            del self._entries[key]
+
+    def stats(self) -> dict:
+        return {
+            "components": sorted(self.components),
+            "max_size": self.max_size,
+            "size": len(self._entries),
+            "skipped": dict(self.hits),
+            "computed": dict(self.misses),
+        }
@@ -0,0 +1,205 @@
+import hashlib
+import json
+import time
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Tuple
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000, 10000000)
+
+COUNTER = "counter"
+GAUGE = "gauge"
+HISTOGRAM = "histogram"
+
+Labels = Tuple[Tuple[str, str], ...]
+Sample = Tuple[str, str, Dict[str, str], float]
+
+
+@lru_cache(maxsize=4096)
+def user_label(auth_token_or_user_id) -> str:
+    if auth_token_or_user_id is None or isinstance(auth_token_or_user_id, int):
+        return str(auth_token_or_user_id or "default")
+    if auth_token_or_user_id == "default":
+        return auth_token_or_user_id
+    # unresolved tokens are never exported as they are
+    return "token-" + hashlib.sha1(str(auth_token_or_user_id).encode()).hexdigest()[:8]
+
+
+class Histogram:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Timer:
+    def __init__(self, metrics: "Metrics", name: str, labels: Dict[str, str]):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.started = 0.0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+class Metrics:
+    def __init__(self, enabled: bool = True, payload_bytes_sample_every: int = 100):
+        self.enabled = enabled
+        self.payload_bytes_sample_every = payload_bytes_sample_every
+        self.descriptions: Dict[str, Tuple[str, str]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.gauges: Dict[str, Dict[Labels, float]] = {}
+        self.collectors: List[Callable[[], Iterable[Sample]]] = []
+        self._payloads = 0
+
+    def describe(self, name: str, kind: str, description: str):
+        self.descriptions[name] = (kind, description)
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels):
+        if not self.enabled:
+            return
+        series = self.histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram(buckets)
+        histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        if not self.enabled:
+            return
+        series = self.counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        if not self.enabled:
+            return
+        self.gauges.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+    def time(self, name: str, **labels) -> Timer:
+        return Timer(self, name, labels)
+
+    def observe_payload(self, name: str, payload, **labels):
+        if not self.enabled or self.payload_bytes_sample_every <= 0:
+            return
+        self._payloads += 1
+        if self._payloads % self.payload_bytes_sample_every == 0:
+            size = len(json.dumps(payload, default=str))
+            self.observe(name, size, buckets=SIZE_BUCKETS, **labels)
+
+    def add_collector(self, collector: Callable[[], Iterable[Sample]]):
+        self.collectors.append(collector)
+
+    def snapshot(self) -> dict:
+        return {
+            "histograms": {
+                name: [
+                    {"labels": dict(key), "count": histogram.count, "sum": histogram.sum}
+                    for key, histogram in series.items()
+                ]
+                for name, series in self.histograms.items()
+            },
+            "counters": {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self.counters.items()
+            },
+            "gauges": {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self.gauges.items()
+            },
+        }
+
+    def render(self, labels: Dict[str, str] = None) -> str:
+        # labels are added to every sample, e.g. the worker that rendered them
+        base: Labels = tuple(sorted((labels or {}).items()))
+        lines = []
+        for name, series in self.histograms.items():
+            self._header(lines, name, HISTOGRAM)
+            for key, histogram in series.items():
+                key = base + key
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(key + (('le', _number(bound)),))} {cumulative}")
+                lines.append(f"{name}_bucket{_labels(key + (('le', '+Inf'),))} {histogram.count}")
+                lines.append(f"{name}_sum{_labels(key)} {_number(histogram.sum)}")
+                lines.append(f"{name}_count{_labels(key)} {histogram.count}")
+
+        collected: Dict[str, Tuple[str, Dict[Labels, float]]] = {}
+        for kind, metrics in ((COUNTER, self.counters), (GAUGE, self.gauges)):
+            for name, series in metrics.items():
+                collected[name] = (kind, dict(series))
+        for collector in self.collectors:
+            for name, kind, labels, value in collector():
+                collected.setdefault(name, (kind, {}))[1][tuple(sorted(labels.items()))] = value
+
+        for name, (kind, series) in collected.items():
+            self._header(lines, name, kind)
+            for key, value in series.items():
+                lines.append(f"{name}{_labels(base + key)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _header(self, lines: List[str], name: str, kind: str):
+        description = self.descriptions.get(name, (kind, ""))[1]
+        if description:
+            lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+
+
+def merge_rendered(texts: Iterable[str]) -> str:
+    # the samples of a metric have to follow its one HELP and TYPE line, so the families of several
+    # rendered texts are regrouped instead of concatenated
+    families: Dict[str, Tuple[List[str], List[str]]] = {}
+    family = None
+    for text in texts:
+        for line in text.splitlines():
+            if not line:
+                continue
+            if line.startswith("# "):
+                family = line.split(" ", 3)[2]
+                headers = families.setdefault(family, ([], []))[0]
+                if line not in headers:
+                    headers.append(line)
+            elif family is not None:
+                families[family][1].append(line)
+    lines = [line for headers, samples in families.values() for line in headers + samples]
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def _labels(key: Labels) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(_label(label, value) for label, value in key) + "}"
+
+
+def _label(label: str, value) -> str:
+    value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return f'{label}="{value}"'
+
+
+def _number(value: float) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
@@ -0,0 +1,68 @@
+import asyncio
+import math
+import time
+from typing import Optional
+
+
+SCHEDULE_DELAY = "delay"
+SCHEDULE_FIXED_RATE = "fixed_rate"
+
+SCHEDULES = (SCHEDULE_DELAY, SCHEDULE_FIXED_RATE)
+
+OVERRUN_CATCH_UP = "catch_up"
+OVERRUN_SKIP = "skip"
+OVERRUN_STRETCH = "stretch"
+
+OVERRUN_POLICIES = (OVERRUN_CATCH_UP, OVERRUN_SKIP, OVERRUN_STRETCH)
+
+
+class TactPacer:
+    period: float
+    overrun: str
+
+    def __init__(self, period: float, overrun: str = OVERRUN_CATCH_UP):
+        if overrun not in OVERRUN_POLICIES:
+            raise ValueError(f"Unknown overrun policy: {overrun}")
+        self.period = max(period, 0.0)
+        self.overrun = overrun
+        self.started: Optional[float] = None
+        self.deadline: Optional[float] = None
+        self.tacts = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.max_lag = 0.0
+
+    async def wait(self) -> dict:
+        now = time.monotonic()
+        if self.deadline is None:
+            self.started = self.deadline = now
+
+        overrun = now > self.deadline and self.tacts > 0 and self.period > 0
+        if now < self.deadline:
+            await asyncio.sleep(self.deadline - now)
+            now = time.monotonic()
+        lag = max(now - self.deadline, 0.0)
+
+        if overrun:
+            self.overruns += 1
+        self.max_lag = max(self.max_lag, lag)
+        self.tacts += 1
+
+        deadline = self.deadline + self.period
+        if overrun and self.overrun == OVERRUN_STRETCH:
+            deadline = now + self.period
+        elif overrun and self.overrun == OVERRUN_SKIP and now > deadline:
+            missed = math.ceil((now - deadline) / self.period)
+            self.skipped += missed
+            deadline += missed * self.period
+        self.deadline = deadline
+
+        elapsed = now - self.started
+        return {
+            "lag_ms": lag * 1000,
+            "overrun": overrun,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "max_lag_ms": self.max_lag * 1000,
+            "rate": (self.tacts - 1) / elapsed if elapsed > 0 else None,
+        }
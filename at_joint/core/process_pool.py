@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Awaitable
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import Set
+from typing import Tuple
+
+
+logger = logging.getLogger(__name__)
+
+# simulation component, translated file id, auth token
+PoolKey = Tuple[str, str, str]
+ProcessId = int | str
+
+CreateProcess = Callable[[str, str, str], Awaitable[ProcessId]]
+KillProcess = Callable[[str, ProcessId, str], Awaitable]
+
+
+class SimulationProcessPool:
+    size: int
+    max_total: int
+    idle_ttl: float
+
+    def __init__(
+        self, create: CreateProcess, kill: KillProcess, size: int = 0, max_total: int = 16, idle_ttl: float = 600.0
+    ):
+        self.create = create
+        self.kill = kill
+        self.size = size
+        self.max_total = max_total
+        self.idle_ttl = idle_ttl
+        self.spares: Dict[PoolKey, Deque[Tuple[float, ProcessId]]] = {}
+        self.creating: Dict[PoolKey, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.created = 0
+        self.expired = 0
+        self._tasks: Set[asyncio.Task] = set()
+        self._sweeper: asyncio.Task | None = None
+        self.closed = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def total(self) -> int:
+        return sum(len(spares) for spares in self.spares.values()) + sum(self.creating.values())
+
+    def take(self, component: str, file_id: str, auth_token: str) -> ProcessId | None:
+        # returns a spare process and starts creating its replacement, None when there is no spare yet
+        if not self.enabled:
+            return None
+        key = (component, file_id, auth_token)
+        self.expire()
+        spares = self.spares.get(key)
+        process_id = None
+        if spares:
+            _, process_id = spares.popleft()
+            self.hits += 1
+        else:
+            self.misses += 1
+        self.refill(component, file_id, auth_token)
+        return process_id
+
+    def refill(self, component: str, file_id: str, auth_token: str):
+        if not self.enabled or self.closed:
+            return
+        key = (component, file_id, auth_token)
+        missing = self.size - len(self.spares.get(key, ())) - self.creating.get(key, 0)
+        for _ in range(min(missing, self.max_total - self.total())):
+            self.creating[key] = self.creating.get(key, 0) + 1
+            self._spawn(self._create(key))
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.ensure_future(self._sweep())
+
+    def retire(self, component: str, process_id: ProcessId, auth_token: str):
+        if process_id is not None:
+            self._spawn(self._kill(component, process_id, auth_token))
+
+    def expire(self):
+        deadline = time.monotonic() - self.idle_ttl
+        for key, spares in list(self.spares.items()):
+            while spares and spares[0][0] <= deadline:
+                _, process_id = spares.popleft()
+                self.expired += 1
+                self.retire(key[0], process_id, key[2])
+            if not spares:
+                del self.spares[key]
+
+    async def close(self):
+        self.closed = True
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+        for key, spares in self.spares.items():
+            for _, process_id in spares:
+                self.retire(key[0], process_id, key[2])
+        self.spares.clear()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _spawn(self, coroutine: Awaitable):
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _create(self, key: PoolKey):
+        component, file_id, auth_token = key
+        try:
+            process_id = await self.create(component, file_id, auth_token)
+        except Exception:
+            logger.exception("Failed to create a spare %s process for %s", component, file_id)
+            return
+        finally:
+            self.creating[key] -= 1
+            if not self.creating[key]:
+                del self.creating[key]
+        self.created += 1
+        if self.closed:
+            # the pool was closed while the process was being created, nothing would ever take or kill it
+            await self._kill(component, process_id, auth_token)
+            return
+        self.spares.setdefault(key, deque()).append((time.monotonic(), process_id))
+
+    async def _kill(self, component: str, process_id: ProcessId, auth_token: str):
+        try:
+            await self.kill(component, process_id, auth_token)
+        except Exception:
+            logger.exception("Failed to kill %s process %s", component, process_id)
+
+    async def _sweep(self):
+        while self.spares or self.creating:
+            await asyncio.sleep(max(self.idle_ttl / 2, 1.0))
+            self.expire()
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "max_total": self.max_total,
+            "idle_ttl": self.idle_ttl,
+            "spares": sum(len(spares) for spares in self.spares.values()),
+            "creating": sum(self.creating.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "created": self.created,
+            "expired": self.expired,
+        }
@@ -0,0 +1,146 @@
+import asyncio
+from collections import deque
+from typing import Awaitable
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+from typing import Union
+
+from at_joint.core.columnar import ResourceFrame
+from at_joint.core.history import STAGES
+
+
+TactSink = Callable[[List[dict]], Awaitable]
+
+# stage -> keys of its result to keep, None keeps the whole stage
+Projection = Dict[str, Optional[Set[str]]]
+
+VERBOSITY_FULL = "full"
+VERBOSITY_WM = "wm"
+VERBOSITY_TACT = "tact"
+
+# fields kept by every verbosity level, None keeps everything
+VERBOSITIES = {
+    VERBOSITY_FULL: None,
+    VERBOSITY_WM: ("at_solver.wm",),
+    VERBOSITY_TACT: (),
+}
+
+# kept in every projected entry
+ENTRY_KEYS = ("tact", "schedule")
+
+
+class TactResults:
+    entries: Union[List[dict], Deque[dict]]
+    sink: Optional[TactSink]
+    chunk_size: int
+    max_pending: int
+    total: int
+
+    def __init__(
+        self,
+        keep_last: int = None,
+        sink: TactSink = None,
+        chunk_size: int = 1,
+        projection: Projection = None,
+        max_pending: int = 2,
+    ):
+        self.entries = deque(maxlen=keep_last) if keep_last is not None else []
+        self.sink = sink
+        self.chunk_size = max(chunk_size, 1)
+        self.projection = projection
+        self.max_pending = max(max_pending, 1)
+        self.total = 0
+        self._chunk: List[dict] = []
+        self._pushes: Deque[asyncio.Future] = deque()
+
+    async def append(self, entry: dict):
+        self.total += 1
+        entry = project(entry, self.projection)
+        self.entries.append(entry)
+        if self.sink is not None:
+            self._chunk.append(entry)
+            if len(self._chunk) >= self.chunk_size:
+                self._push()
+            # a slow sink holds the run back instead of piling up chunks, and a failed one stops it
+            await self._settle(self.max_pending)
+
+    def _push(self):
+        chunk, self._chunk = self._chunk, []
+        previous = self._pushes[-1] if self._pushes else None
+        self._pushes.append(asyncio.ensure_future(self._send(previous, chunk)))
+
+    async def _send(self, previous: Optional[asyncio.Future], chunk: List[dict]):
+        if previous is not None:
+            # chunks go out in order, and none of them after a failed one
+            await asyncio.wait([previous])
+            if previous.cancelled() or previous.exception() is not None:
+                return
+        await self.sink([materialize(entry) for entry in chunk])
+
+    async def _settle(self, pending: int):
+        while self._pushes and (len(self._pushes) > pending or self._pushes[0].done()):
+            try:
+                await self._pushes.popleft()
+            except BaseException:
+                self.cancel()
+                raise
+
+    def cancel(self):
+        for push in self._pushes:
+            push.cancel()
+        self._pushes.clear()
+
+    async def close(self):
+        if self._chunk:
+            self._push()
+        await self._settle(0)
+
+    def result(self) -> List[dict]:
+        return [materialize(entry) for entry in self.entries]
+
+
+def get_projection(fields: Iterable[str] = None, verbosity: str = VERBOSITY_FULL) -> Optional[Projection]:
+    # fields are stages ("at_solver") or keys of their results ("at_solver.wm"), they override verbosity
+    if verbosity not in VERBOSITIES:
+        raise ValueError(f"Unknown verbosity: {verbosity}")
+    if fields is None:
+        fields = VERBOSITIES[verbosity]
+        if fields is None:
+            return None
+    projection: Projection = {}
+    for field in fields:
+        stage, _, key = field.partition(".")
+        if stage not in STAGES or (key and stage == "at_simulation"):
+            raise ValueError(f"Unknown result field: {field}")
+        if not key:
+            projection[stage] = None
+        elif projection.get(stage, set()) is not None:
+            projection.setdefault(stage, set()).add(key)
+    return projection
+
+
+def project(entry: dict, projection: Optional[Projection]) -> dict:
+    if projection is None:
+        return entry
+    projected = {key: entry[key] for key in ENTRY_KEYS if key in entry}
+    for stage, keys in projection.items():
+        if stage not in entry:
+            continue
+        value = entry[stage]
+        if keys is not None and isinstance(value, dict):
+            value = {key: value[key] for key in keys if key in value}
+        projected[stage] = value
+    return projected
+
+
+def materialize(entry: dict) -> dict:
+    # simulation results are kept as frames until they leave the process
+    frame = entry.get("at_simulation")
+    if isinstance(frame, ResourceFrame):
+        return {**entry, "at_simulation": frame.to_resource_parameters()}
+    return entry
@@ -0,0 +1,38 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import List
+from typing import Tuple
+
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfile:
+    enabled: bool
+    phases: List[Tuple[str, float, float]]
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name: str):
+        # phases may overlap when they run concurrently, each one is measured on its own
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, started - self.started, time.perf_counter() - started))
+
+    def report(self) -> str:
+        lines = [f"{'phase':<28}{'start ms':>10}{'took ms':>10}"]
+        for name, offset, duration in sorted(self.phases, key=lambda phase: phase[1]):
+            lines.append(f"{name:<28}{offset * 1000:>10.1f}{duration * 1000:>10.1f}")
+        lines.append(f"{'total':<28}{0:>10.1f}{(time.perf_counter() - self.started) * 1000:>10.1f}")
+        return "\n".join(lines)
+
+    def log(self):
+        if self.enabled:
+            logger.info("Startup profile\n%s", self.report())
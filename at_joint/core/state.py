@@ -0,0 +1,122 @@
+import json
+import sqlite3
+from abc import ABC
+from abc import abstractmethod
+from collections.abc import MutableMapping
+from typing import Any
+from typing import Callable
+from typing import Iterator
+
+
+STATE_MEMORY = "memory"
+STATE_SQLITE = "sqlite"
+STATE_BACKENDS = (STATE_MEMORY, STATE_SQLITE)
+
+
+class StateBackend(ABC):
+    # a shared backend is seen by every worker process that uses it
+    shared: bool = False
+
+    @abstractmethod
+    def mapping(self, namespace: str, encode: Callable = None, decode: Callable = None) -> MutableMapping:
+        pass
+
+    def close(self):
+        pass
+
+
+class MemoryState(StateBackend):
+    def mapping(self, namespace: str, encode: Callable = None, decode: Callable = None) -> MutableMapping:
+        return {}
+
+
+class SQLiteMapping(MutableMapping):
+    def __init__(
+        self, connection: sqlite3.Connection, namespace: str, encode: Callable = None, decode: Callable = None
+    ):
+        self.connection = connection
+        self.namespace = namespace
+        self.encode = encode
+        self.decode = decode
+
+    # keys are stored as JSON, so user ids and tokens stay distinct
+    def __getitem__(self, key) -> Any:
+        row = self.connection.execute(
+            "SELECT value FROM state WHERE namespace = ? AND key = ?", (self.namespace, json.dumps(key))
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        value = json.loads(row[0])
+        return self.decode(value) if self.decode is not None else value
+
+    def __setitem__(self, key, value):
+        if self.encode is not None:
+            value = self.encode(value)
+        self.connection.execute(
+            "INSERT OR REPLACE INTO state (namespace, key, value) VALUES (?, ?, ?)",
+            (self.namespace, json.dumps(key), json.dumps(value)),
+        )
+
+    def setdefault(self, key, default=None) -> Any:
+        # one statement, so workers claiming the same key at once all get the value stored first
+        value = self.encode(default) if self.encode is not None else default
+        self.connection.execute(
+            "INSERT INTO state (namespace, key, value) VALUES (?, ?, ?) ON CONFLICT (namespace, key) DO NOTHING",
+            (self.namespace, json.dumps(key), json.dumps(value)),
+        )
+        return self[key]
+
+    def replace(self, key, old, new) -> Any:
+        # stores new only if the value is still old and returns whatever is stored afterwards
+        if self.encode is not None:
+            old, new = self.encode(old), self.encode(new)
+        self.connection.execute(
+            "UPDATE state SET value = ? WHERE namespace = ? AND key = ? AND value = ?",
+            (json.dumps(new), self.namespace, json.dumps(key), json.dumps(old)),
+        )
+        return self[key]
+
+    def __delitem__(self, key):
+        cursor = self.connection.execute(
+            "DELETE FROM state WHERE namespace = ? AND key = ?", (self.namespace, json.dumps(key))
+        )
+        if not cursor.rowcount:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator:
+        rows = self.connection.execute("SELECT key FROM state WHERE namespace = ?", (self.namespace,)).fetchall()
+        return (json.loads(key) for (key,) in rows)
+
+    def __len__(self) -> int:
+        row = self.connection.execute("SELECT COUNT(*) FROM state WHERE namespace = ?", (self.namespace,)).fetchone()
+        return row[0]
+
+
+class SQLiteState(StateBackend):
+    shared = True
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS state "
+            "(namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+
+    def mapping(self, namespace: str, encode: Callable = None, decode: Callable = None) -> MutableMapping:
+        return SQLiteMapping(self.connection, namespace, encode=encode, decode=decode)
+
+    def close(self):
+        self.connection.close()
+
+
+def get_state_backend(backend: str = STATE_MEMORY, path: str = None) -> StateBackend:
+    if backend == STATE_MEMORY:
+        return MemoryState()
+    if backend == STATE_SQLITE:
+        if not path:
+            raise ValueError("SQLite state backend needs a path")
+        return SQLiteState(path)
+    raise ValueError(f"Unknown state backend: {backend}")
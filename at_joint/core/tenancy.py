@@ -0,0 +1,217 @@
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from contextlib import contextmanager
+from typing import Deque
+from typing import Dict
+from typing import Hashable
+from typing import Optional
+from typing import Set
+
+
+ADMISSION_QUEUE = "queue"
+ADMISSION_REJECT = "reject"
+
+ADMISSION_POLICIES = (ADMISSION_QUEUE, ADMISSION_REJECT)
+
+
+class ComponentLimiter:
+    max_inflight: int
+
+    def __init__(self, max_inflight: int = 0):
+        self.max_inflight = max_inflight
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.inflight: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def acquire(self, component: Optional[str]):
+        # None is a call that is not limited
+        if self.max_inflight <= 0 or component is None:
+            yield
+            return
+        semaphore = self._semaphores.get(component)
+        if semaphore is None:
+            semaphore = self._semaphores[component] = asyncio.Semaphore(self.max_inflight)
+        async with semaphore:
+            self.inflight[component] = self.inflight.get(component, 0) + 1
+            try:
+                yield
+            finally:
+                self.inflight[component] -= 1
+
+    def stats(self) -> dict:
+        return {"max_inflight": self.max_inflight, "inflight": dict(self.inflight)}
+
+
+class FairScheduler:
+    slots: int
+    weights: Dict[str, float]
+
+    def __init__(self, slots: int = 0, weights: Dict[Hashable, float] = None):
+        self.slots = slots
+        self.available = slots
+        self.weights = {str(user): weight for user, weight in (weights or {}).items()}
+        self.granted: Dict[Hashable, int] = {}
+        self.granted_total = 0
+        self._waiters: Dict[Hashable, Deque[asyncio.Future]] = {}
+        self._passes: Dict[Hashable, float] = {}
+        self._holding: Dict[Hashable, int] = {}
+        self._virtual_time = 0.0
+
+    @asynccontextmanager
+    async def turn(self, user: Hashable):
+        if self.slots <= 0:
+            yield
+            return
+        await self._acquire(user)
+        self._holding[user] = self._holding.get(user, 0) + 1
+        try:
+            yield
+        finally:
+            self._holding[user] -= 1
+            if not self._holding[user]:
+                del self._holding[user]
+            self._release()
+            self._forget_idle()
+
+    async def _acquire(self, user: Hashable):
+        if self.available > 0 and not self._waiters:
+            self.available -= 1
+            self._account(user)
+            return
+        future = asyncio.get_event_loop().create_future()
+        self._waiters.setdefault(user, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+    def _release(self):
+        while self._waiters:
+            # stride scheduling: the waiting user with the smallest pass gets the slot,
+            # and every grant moves the user's pass forward by 1 / weight
+            user = min(self._waiters, key=lambda waiting: self._passes.get(waiting, self._virtual_time))
+            queue = self._waiters[user]
+            future = queue.popleft()
+            if not queue:
+                del self._waiters[user]
+            if future.cancelled():
+                continue
+            self._account(user)
+            future.set_result(None)
+            return
+        self.available += 1
+
+    def _account(self, user: Hashable):
+        current = max(self._passes.get(user, self._virtual_time), self._virtual_time)
+        self._virtual_time = current
+        self._passes[user] = current + 1 / max(self.weights.get(str(user), 1.0), 1e-6)
+        self.granted[user] = self.granted.get(user, 0) + 1
+        self.granted_total += 1
+
+    def _forget_idle(self):
+        # a user that neither waits nor holds a slot and is not ahead of the users that do would come back
+        # with the same pass as a new one, so it is forgotten
+        active = self._waiters.keys() | self._holding.keys()
+        floor = min((self._passes.get(user, self._virtual_time) for user in active), default=None)
+        idle = [
+            user
+            for user, user_pass in self._passes.items()
+            if user not in active and (floor is None or user_pass <= floor)
+        ]
+        for user in idle:
+            del self._passes[user]
+            self.granted.pop(user, None)
+
+    def waiting(self) -> Dict[Hashable, int]:
+        return {user: len(queue) for user, queue in self._waiters.items()}
+
+    def stats(self) -> dict:
+        return {
+            "slots": self.slots,
+            "available": self.available,
+            "waiting": {str(user): count for user, count in self.waiting().items()},
+            "granted": {str(user): count for user, count in self.granted.items()},
+            "granted_total": self.granted_total,
+        }
+
+
+class AdmissionControl:
+    max_runs: int
+    policy: str
+
+    def __init__(self, max_runs: int = 0, policy: str = ADMISSION_QUEUE):
+        if policy not in ADMISSION_POLICIES:
+            raise ValueError(f"Unknown admission policy: {policy}")
+        self.max_runs = max_runs
+        self.policy = policy
+        self.running = 0
+        self.queued = 0
+        self.rejected = 0
+        self._condition = None
+
+    @asynccontextmanager
+    async def admit(self):
+        if self.max_runs > 0:
+            if self._condition is None:
+                self._condition = asyncio.Condition()
+            async with self._condition:
+                if self.running >= self.max_runs and self.policy == ADMISSION_REJECT:
+                    self.rejected += 1
+                    raise ValueError(f"ATJoint is running {self.running} tact loops, which is its capacity")
+                self.queued += 1
+                try:
+                    await self._condition.wait_for(lambda: self.running < self.max_runs)
+                finally:
+                    self.queued -= 1
+                self.running += 1
+            try:
+                yield
+            finally:
+                async with self._condition:
+                    self.running -= 1
+                    self._condition.notify()
+        else:
+            self.running += 1
+            try:
+                yield
+            finally:
+                self.running -= 1
+
+    def stats(self) -> dict:
+        return {
+            "max_runs": self.max_runs,
+            "policy": self.policy,
+            "running": self.running,
+            "queued": self.queued,
+            "rejected": self.rejected,
+        }
+
+
+class UserRuns:
+    # a sweep resets the components of the user, so it never runs together with a tact loop of the same user
+    def __init__(self):
+        self.loops: Dict[Hashable, int] = {}
+        self.sweeps: Set[Hashable] = set()
+
+    @contextmanager
+    def run(self, user: Hashable, sweep: bool = False):
+        if user in self.sweeps:
+            raise ValueError("A sweep of the user is in progress")
+        if sweep and self.loops.get(user):
+            raise ValueError("A tact loop of the user is in progress")
+        if sweep:
+            self.sweeps.add(user)
+        else:
+            self.loops[user] = self.loops.get(user, 0) + 1
+        try:
+            yield
+        finally:
+            if sweep:
+                self.sweeps.discard(user)
+            else:
+                self.loops[user] -= 1
+                if not self.loops[user]:
+                    del self.loops[user]
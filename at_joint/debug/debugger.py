@@ -1,4 +1,3 @@
-import json
 from typing import TYPE_CHECKING
 
 from at_queue.core.at_component import ATComponent
@@ -21,7 +20,13 @@ class ATJointDebugger(ATComponent):
 
     @authorized_method
     async def debug(self, data: dict, auth_token: str = None):
-        await self.websocket_manager.send_message(auth_token, json.dumps(data))
+        await self.websocket_manager.send_message(auth_token, data)
+        return True
+
+    @authorized_method
+    async def consume_tacts(self, tacts: list, auth_token: str = None):
+        for tact in tacts:
+            await self.websocket_manager.send_message(auth_token, {"initiator": "at_joint_tact", "data": tact})
         return True
 
     async def inspect(self, component):
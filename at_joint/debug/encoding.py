@@ -0,0 +1,141 @@
+import json
+import zlib
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Union
+
+from at_joint.core.blackboard import same_value
+
+
+ENCODING_JSON = "json"
+ENCODING_BINARY_DELTA = "binary-delta"
+
+ENCODINGS = (ENCODING_JSON, ENCODING_BINARY_DELTA)
+
+FRAME_VERSION = 1
+FRAME_KEYFRAME = 0
+FRAME_DELTA = 1
+
+OP_SET = "s"
+OP_DELETE = "d"
+
+_MISSING = object()
+
+
+def _dumps(data: Any) -> str:
+    return json.dumps(data, separators=(",", ":"))
+
+
+class OutgoingMessage:
+    def __init__(self, data: dict):
+        self.data = data
+        self._json = None
+        self._keyframe = None
+
+    @property
+    def json(self) -> str:
+        if self._json is None:
+            self._json = json.dumps(self.data)
+        return self._json
+
+    @property
+    def keyframe(self) -> bytes:
+        if self._keyframe is None:
+            self._keyframe = pack_frame(FRAME_KEYFRAME, self.data)
+        return self._keyframe
+
+
+def pack_frame(frame_type: int, payload: dict) -> bytes:
+    return bytes((FRAME_VERSION, frame_type)) + zlib.compress(_dumps(payload).encode())
+
+
+def unpack_frame(frame: bytes) -> tuple:
+    if frame[0] != FRAME_VERSION:
+        raise ValueError(f"Unsupported frame version: {frame[0]}")
+    return frame[1], json.loads(zlib.decompress(frame[2:]))
+
+
+def diff(previous: Any, current: Any, path: tuple = ()) -> List[list]:
+    if isinstance(previous, dict) and isinstance(current, dict):
+        ops = []
+        for key, value in current.items():
+            old = previous.get(key, _MISSING)
+            if old is _MISSING:
+                ops.append([OP_SET, [*path, key], value])
+            elif not same_value(old, value):
+                ops.extend(diff(old, value, (*path, key)))
+        for key in previous:
+            if key not in current:
+                ops.append([OP_DELETE, [*path, key]])
+        return ops
+    if same_value(previous, current):
+        return []
+    return [[OP_SET, list(path), current]]
+
+
+def patch(previous: Any, ops: List[list]) -> Any:
+    result = previous
+    for op in ops:
+        path = op[1]
+        if not path:
+            result = op[2]
+            continue
+        target = result
+        for key in path[:-1]:
+            target = target[key]
+        if op[0] == OP_SET:
+            target[path[-1]] = op[2]
+        else:
+            target.pop(path[-1], None)
+    return result
+
+
+class JsonEncoder:
+    def encode(self, message: OutgoingMessage) -> str:
+        return message.json
+
+
+class DeltaEncoder:
+    def __init__(self, keyframe_interval: int = 50):
+        self.keyframe_interval = max(keyframe_interval, 1)
+        self.previous: Dict[str, Any] = {}
+        self.counts: Dict[str, int] = {}
+
+    def encode(self, message: OutgoingMessage) -> bytes:
+        initiator = message.data.get("initiator")
+        data = message.data.get("data")
+        count = self.counts.get(initiator, 0)
+        previous = self.previous.get(initiator, _MISSING)
+
+        self.previous[initiator] = data
+        self.counts[initiator] = count + 1
+
+        if previous is _MISSING or count % self.keyframe_interval == 0:
+            return message.keyframe
+        return pack_frame(FRAME_DELTA, {"initiator": initiator, "ops": diff(previous, data)})
+
+
+class DeltaDecoder:
+    def __init__(self):
+        self.previous: Dict[str, Any] = {}
+
+    def decode(self, frame: bytes) -> dict:
+        frame_type, payload = unpack_frame(frame)
+        initiator = payload.get("initiator")
+        if frame_type == FRAME_KEYFRAME:
+            data = payload.get("data")
+        else:
+            if initiator not in self.previous:
+                raise ValueError(f"Delta frame for {initiator} received before its keyframe")
+            data = patch(json.loads(_dumps(self.previous[initiator])), payload["ops"])
+        self.previous[initiator] = data
+        return {"initiator": initiator, "data": data}
+
+
+def get_encoder(encoding: str, keyframe_interval: int = 50) -> Union[JsonEncoder, DeltaEncoder]:
+    if encoding == ENCODING_JSON:
+        return JsonEncoder()
+    if encoding == ENCODING_BINARY_DELTA:
+        return DeltaEncoder(keyframe_interval=keyframe_interval)
+    raise ValueError(f"Unknown debugger encoding: {encoding}")
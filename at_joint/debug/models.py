@@ -1,3 +1,9 @@
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Literal
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -5,3 +11,46 @@ class ProcessTactModel(BaseModel):
     background: bool = True
     iterate: int = 1
     wait: int = 1000
+    pipeline_depth: int = 1
+    sink: Optional[str] = None
+    sink_chunk_size: int = 1
+    keep_last: Optional[int] = None
+    schedule: Literal["delay", "fixed_rate"] = "delay"
+    overrun: Literal["catch_up", "skip", "stretch"] = "catch_up"
+    fields: Optional[List[str]] = None
+    verbosity: Literal["full", "wm", "tact"] = "full"
+
+
+class ReplayModel(BaseModel):
+    background: bool = True
+    tacts: Optional[List[List[Dict[str, Any]]]] = None
+    run: Optional[int] = None
+    start: int = 0
+    end: Optional[int] = None
+    pipeline_depth: int = 1
+    sink: Optional[str] = None
+    sink_chunk_size: int = 1
+    keep_last: Optional[int] = None
+    fields: Optional[List[str]] = None
+    verbosity: Literal["full", "wm", "tact"] = "full"
+
+
+class SweepRunModel(BaseModel):
+    name: Optional[str] = None
+    file_id: Optional[str] = None
+    at_simulation: Optional[str] = None
+    at_solver: Optional[str] = None
+    at_temporal_solver: Optional[str] = None
+    at_blackboard: Optional[str] = None
+
+
+class SweepModel(BaseModel):
+    background: bool = True
+    runs: List[SweepRunModel]
+    iterate: int = 1
+    wait: int = 0
+    pipeline_depth: int = 1
+    parallelism: int = 2
+    sink: Optional[str] = None
+    sink_chunk_size: int = 1
+    keep_last: Optional[int] = None
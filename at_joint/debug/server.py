@@ -1,8 +1,16 @@
 import argparse
 import asyncio
+import logging
 import os
+import time
 from pathlib import Path
+from typing import Any
+from typing import Awaitable
+from typing import Callable
 from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
 from uuid import NAMESPACE_OID
 from uuid import uuid3
 from uuid import uuid4
@@ -16,45 +24,241 @@ from fastapi import status
 from fastapi import WebSocket
 from fastapi import WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from uvicorn import Config as UviConfig
 from uvicorn import Server
 
+from at_joint.core.metrics import COUNTER
+from at_joint.core.metrics import GAUGE
+from at_joint.core.metrics import merge_rendered
+from at_joint.core.metrics import Metrics
+from at_joint.core.metrics import user_label
+from at_joint.core.startup import StartupProfile
 from at_joint.debug.debugger import ATJointDebugger
+from at_joint.debug.encoding import ENCODING_JSON
+from at_joint.debug.encoding import ENCODINGS
+from at_joint.debug.encoding import get_encoder
+from at_joint.debug.encoding import OutgoingMessage
 from at_joint.debug.models import ProcessTactModel
+from at_joint.debug.models import ReplayModel
+from at_joint.debug.models import SweepModel
 
 
+logger = logging.getLogger(__name__)
+
 EXCHANGE_NAME = "at-joint-debugger-" + str(uuid3(NAMESPACE_OID, "at-joint-debugger"))
 
+SLOW_CONSUMER_DROP = "drop"
+SLOW_CONSUMER_DISCONNECT = "disconnect"
+
+
+class ClientSession:
+    def __init__(
+        self, websocket: WebSocket, max_queue: int, encoding: str = ENCODING_JSON, keyframe_interval: int = 50
+    ):
+        self.websocket = websocket
+        self.encoding = encoding
+        self.encoder = get_encoder(encoding, keyframe_interval=keyframe_interval)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.writer: Optional[asyncio.Task] = None
+        self.sent = 0
+        self.dropped = 0
+        self.lagging_since: Optional[float] = None
+
+    def stats(self) -> dict:
+        return {
+            "encoding": self.encoding,
+            "queue_depth": self.queue.qsize(),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "lag": time.monotonic() - self.lagging_since if self.lagging_since is not None else 0.0,
+        }
+
 
 # WebSocket manager
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: Dict[str, Dict[str, WebSocket]] = {}
-
-    async def connect(self, auth_token: str, session_id: str, websocket: WebSocket):
+    def __init__(self, max_queue: int = 100, slow_consumer: str = SLOW_CONSUMER_DROP, lag_threshold: float = 10.0):
+        self.active_connections: Dict[str, Dict[str, ClientSession]] = {}
+        self.sent = 0
+        self.dropped = 0
+        self.max_queue = max_queue
+        self.slow_consumer = slow_consumer
+        self.lag_threshold = lag_threshold
+
+    async def connect(
+        self,
+        auth_token: str,
+        session_id: str,
+        websocket: WebSocket,
+        encoding: str = ENCODING_JSON,
+        keyframe_interval: int = 50,
+    ):
         await websocket.accept()
+        session = ClientSession(websocket, self.max_queue, encoding=encoding, keyframe_interval=keyframe_interval)
+        session.writer = asyncio.get_event_loop().create_task(self.write(auth_token, session_id, session))
         sessions = self.active_connections.get(auth_token, {})
-        sessions[session_id] = websocket
+        sessions[session_id] = session
         self.active_connections[auth_token] = sessions
 
     def disconnect(self, auth_token: str, session_id: str):
+        sessions = self.active_connections.get(auth_token)
+        if sessions is None:
+            return
+        session = sessions.pop(session_id, None)
+        if session is not None and session.writer is not None:
+            session.writer.cancel()
+        if not sessions:
+            self.active_connections.pop(auth_token, None)
+
+    async def write(self, auth_token: str, session_id: str, session: ClientSession):
+        try:
+            while True:
+                message = await session.queue.get()
+                # messages are encoded when sent, so deltas are always computed against what the client received
+                frame = session.encoder.encode(message)
+                if isinstance(frame, bytes):
+                    await session.websocket.send_bytes(frame)
+                else:
+                    await session.websocket.send_text(frame)
+                session.sent += 1
+                self.sent += 1
+                if session.queue.empty():
+                    session.lagging_since = None
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.info("Websocket session %s is closed", session_id)
+            self.disconnect(auth_token, session_id)
+
+    def enqueue(self, auth_token: str, session_id: str, session: ClientSession, message: OutgoingMessage):
+        if session.queue.full():
+            now = time.monotonic()
+            if session.lagging_since is None:
+                session.lagging_since = now
+            if self.slow_consumer == SLOW_CONSUMER_DISCONNECT and now - session.lagging_since >= self.lag_threshold:
+                logger.warning("Disconnecting slow websocket session %s", session_id)
+                self.disconnect(auth_token, session_id)
+                asyncio.ensure_future(session.websocket.close(code=status.WS_1008_POLICY_VIOLATION))
+                return
+            session.queue.get_nowait()
+            session.dropped += 1
+            self.dropped += 1
+        session.queue.put_nowait(message)
+
+    async def send_message(self, auth_token: str, data: dict):
         sessions = self.active_connections.get(auth_token, {})
-        sessions.pop(session_id, None)
-        self.active_connections[auth_token] = sessions
+        message = OutgoingMessage(data)
+        for session_id, session in list(sessions.items()):
+            self.enqueue(auth_token, session_id, session, message)
 
-    async def send_message(self, auth_token: str, message: str):
+    def stats(self, auth_token: str) -> dict:
         sessions = self.active_connections.get(auth_token, {})
-        for _, websocket in sessions.items():
-            await websocket.send_text(message)
+        return {session_id: session.stats() for session_id, session in sessions.items()}
 
 
 manager = ConnectionManager()
 
 
+class RegistrySnapshot:
+    # registration and configuration lookups shared by all clients for ttl seconds,
+    # concurrent requests for the same lookup wait for one broker round-trip
+    def __init__(self, ttl: float = 1.0):
+        self.ttl = ttl
+        self._entries: Dict[Tuple, Tuple[float, asyncio.Future]] = {}
+        self._next_prune = 0.0
+
+    async def lookup(self, key: Tuple, fetch: Callable[[], Awaitable]) -> Any:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= now:
+            self._prune(now)
+            entry = self._entries[key] = (now + self.ttl, asyncio.ensure_future(fetch()))
+        try:
+            return await asyncio.shield(entry[1])
+        except Exception:
+            if self._entries.get(key) is entry:
+                self._entries.pop(key, None)
+            raise
+
+    def _prune(self, now: float):
+        # entries of tokens that are not asked for again are dropped at most once per ttl
+        if now < self._next_prune:
+            return
+        self._next_prune = now + self.ttl
+        for key, (expires, _) in list(self._entries.items()):
+            if expires <= now:
+                del self._entries[key]
+
+    async def registered(self, inspector: ATJointDebugger, component: str) -> bool:
+        return await self.lookup(("registered", component), lambda: inspector.check_external_registered(component))
+
+    async def configured(self, inspector: ATJointDebugger, component: str, auth_token: str) -> bool:
+        return await self.lookup(
+            ("token", auth_token, "configured", component),
+            lambda: inspector.check_external_configured(component, auth_token=auth_token),
+        )
+
+    async def config(self, inspector: ATJointDebugger, auth_token: str) -> dict:
+        return await self.lookup(
+            ("token", auth_token, "config"),
+            lambda: inspector.exec_external_method("ATJoint", "get_config", {}, auth_token=auth_token),
+        )
+
+    async def status(self, inspector: ATJointDebugger, component: str, auth_token: str) -> dict:
+        # configuration of a component that is not registered usually fails, which only matters when it is
+        registered, configured = await asyncio.gather(
+            self.registered(inspector, component),
+            self.configured(inspector, component, auth_token),
+            return_exceptions=True,
+        )
+        if isinstance(registered, BaseException):
+            raise registered
+        if not registered:
+            return {"registered": False}
+        if isinstance(configured, BaseException):
+            raise configured
+        return {"registered": True, "configured": configured}
+
+    def invalidate(self, auth_token: str = None):
+        # only the entries scoped to the token, registrations are not per token
+        for key in list(self._entries):
+            if auth_token is None or key[:2] == ("token", auth_token):
+                self._entries.pop(key, None)
+
+
+registry = RegistrySnapshot()
+
+
+def collect_connection_metrics():
+    # sessions come and go with every page load, so they are summed per user instead of labelled
+    for auth_token, sessions in manager.active_connections.items():
+        labels = {"user": user_label(auth_token)}
+        yield "at_joint_debugger_ws_sessions", GAUGE, labels, len(sessions)
+        yield "at_joint_debugger_ws_queue_depth", GAUGE, labels, sum(s.queue.qsize() for s in sessions.values())
+    yield "at_joint_debugger_ws_sent_total", COUNTER, {}, manager.sent
+    yield "at_joint_debugger_ws_dropped_total", COUNTER, {}, manager.dropped
+
+
+debugger_metrics = Metrics()
+debugger_metrics.add_collector(collect_connection_metrics)
+
+
 class GLOBAL:
     inspector: ATJointDebugger = None
+    args: dict = None
+
+
+# options of the debugger server itself, the rest are connection parameters
+SERVER_OPTIONS = (
+    "debugger_host",
+    "debugger_port",
+    "ws_queue_size",
+    "ws_slow_consumer",
+    "ws_lag_threshold",
+    "registry_snapshot_ttl",
+)
 
 
 CURRENT_FILE_PATH = Path(__file__).resolve()
@@ -108,8 +312,41 @@ def get_args() -> dict:
         required=False,
         default=8000,
     )
+    parser.add_argument(
+        "--ws-queue-size",
+        dest="ws_queue_size",
+        help="Maximum number of messages waiting to be sent to one websocket session",
+        type=int,
+        required=False,
+        default=100,
+    )
+    parser.add_argument(
+        "--ws-slow-consumer",
+        dest="ws_slow_consumer",
+        help="What to do with a websocket session whose queue is full: drop the oldest messages or disconnect it "
+        "once it lags for longer than --ws-lag-threshold",
+        choices=[SLOW_CONSUMER_DROP, SLOW_CONSUMER_DISCONNECT],
+        required=False,
+        default=SLOW_CONSUMER_DROP,
+    )
+    parser.add_argument(
+        "--ws-lag-threshold",
+        dest="ws_lag_threshold",
+        help="Seconds a websocket session may stay with a full queue before it is disconnected",
+        type=float,
+        required=False,
+        default=10.0,
+    )
+    parser.add_argument(
+        "--registry-snapshot-ttl",
+        dest="registry_snapshot_ttl",
+        help="Seconds the registration and configuration lookups of /api/state are shared between clients",
+        type=float,
+        required=False,
+        default=1.0,
+    )
 
-    args = parser.parse_args()
+    args, _ = parser.parse_known_args()
     res = vars(args)
     res.pop("debugger", False)
     return res
@@ -118,9 +355,9 @@ def get_args() -> dict:
 async def get_inspector() -> ATJointDebugger:
     inspector = GLOBAL.inspector
     if inspector is None:
-        args = get_args()
-        args.pop("debugger_host", None)
-        args.pop("debugger_port", None)
+        # main has parsed the arguments already, unless the app is served some other way
+        args = GLOBAL.args if GLOBAL.args is not None else get_args()
+        args = {key: value for key, value in args.items() if key not in SERVER_OPTIONS}
         connection_parameters = ConnectionParameters(**args)
         inspector = ATJointDebugger(websocket_manager=manager, connection_parameters=connection_parameters)
     if not inspector.initialized:
@@ -171,6 +408,47 @@ async def process_tact(*, token: str, body: ProcessTactModel):
     return await task
 
 
+@app.post("/api/replay")
+async def replay(*, token: str, body: ReplayModel):
+    inspector = await get_inspector()
+    if not inspector.started:
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Inspector is not started")
+    if not await inspector.check_external_registered("ATJoint"):
+        raise HTTPException(status.HTTP_406_NOT_ACCEPTABLE, detail="ATJoint is not registered")
+    if not await inspector.check_external_configured("ATJoint", auth_token=token):
+        raise HTTPException(status.HTTP_403_FORBIDDEN, detail="ATJoint is not configured for provided token")
+
+    data = body.model_dump()
+    background = data.pop("background")
+    loop = asyncio.get_event_loop()
+    task = loop.create_task(inspector.exec_external_method("ATJoint", "replay", data, auth_token=token))
+    if background:
+        await asyncio.sleep(0)
+        return {"success": True}
+    return await task
+
+
+@app.post("/api/sweep")
+async def sweep(*, token: str, body: SweepModel):
+    inspector = await get_inspector()
+    if not inspector.started:
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Inspector is not started")
+    if not await inspector.check_external_registered("ATJoint"):
+        raise HTTPException(status.HTTP_406_NOT_ACCEPTABLE, detail="ATJoint is not registered")
+    if not await inspector.check_external_configured("ATJoint", auth_token=token):
+        raise HTTPException(status.HTTP_403_FORBIDDEN, detail="ATJoint is not configured for provided token")
+
+    data = body.model_dump()
+    data["runs"] = [{key: value for key, value in run.items() if value is not None} for run in data["runs"]]
+    background = data.pop("background")
+    loop = asyncio.get_event_loop()
+    task = loop.create_task(inspector.exec_external_method("ATJoint", "sweep", data, auth_token=token))
+    if background:
+        await asyncio.sleep(0)
+        return {"success": True}
+    return await task
+
+
 @app.get("/api/stop")
 async def stop(*, token: str):
     inspector = await get_inspector()
@@ -198,18 +476,23 @@ async def reset(*, token: str):
     if not await inspector.check_external_configured("ATJoint", auth_token=token):
         raise HTTPException(status.HTTP_403_FORBIDDEN, detail="ATJoint is not configured for provided token")
 
-    components = await inspector.exec_external_method("ATJoint", "get_config", {}, auth_token=token)
+    components = await registry.config(inspector, token)
     for cmp in ["at_temporal_solver", "at_solver"]:
-        component = components.get(cmp)
-        if not component:
+        if not components.get(cmp):
             raise HTTPException(status.HTTP_406_NOT_ACCEPTABLE, detail=f"Component {cmp} is not set up in ATJoint")
-        if await inspector.check_external_registered(components[cmp]):
-            if await inspector.check_external_configured(components[cmp], auth_token=token):
-                await inspector.exec_external_method(component, "reset", {}, auth_token=token)
-        if await inspector.check_external_registered("ATJoint"):
-            if await inspector.check_external_configured("ATJoint"):
-                await inspector.exec_external_method("ATJoint", "reset", {}, auth_token=token)
 
+    async def reset_component(component: str):
+        component_status = await registry.status(inspector, component, token)
+        if component_status["registered"] and component_status["configured"]:
+            await inspector.exec_external_method(component, "reset", {}, auth_token=token)
+
+    # the solvers and ATJoint (which restarts the simulation process) are reset independently
+    await asyncio.gather(
+        reset_component(components["at_temporal_solver"]),
+        reset_component(components["at_solver"]),
+        inspector.exec_external_method("ATJoint", "reset", {}, auth_token=token),
+    )
+    registry.invalidate(token)
     return {"success": True}
 
 
@@ -227,26 +510,70 @@ async def state(*, token: str):
         "at_blackboard": {},
     }
 
+    result["at_joint"] = await registry.status(inspector, "ATJoint", token)
+    if result["at_joint"].get("configured"):
+        components = await registry.config(inspector, token)
+        names = [cmp for cmp in result if cmp in components]
+        statuses = await asyncio.gather(*(registry.status(inspector, components[cmp], token) for cmp in names))
+        result.update(zip(names, statuses))
+
+    return result
+
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def metrics(*, token: str = None):
+    # without a token only the metrics of the debugger itself are served
+    texts = [debugger_metrics.render()]
+    if token is None:
+        return PlainTextResponse(merge_rendered(texts))
+    inspector = await get_inspector()
+    if not inspector.started:
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Inspector is not started")
     if not await inspector.check_external_registered("ATJoint"):
-        result["at_joint"]["registered"] = False
-    else:
-        result["at_joint"]["registered"] = True
+        raise HTTPException(status.HTTP_406_NOT_ACCEPTABLE, detail="ATJoint is not registered")
+    if not await inspector.check_external_configured("ATJoint", auth_token=token):
+        raise HTTPException(status.HTTP_403_FORBIDDEN, detail="ATJoint is not configured for provided token")
 
-        if not await inspector.check_external_configured("ATJoint", auth_token=token):
-            result["at_joint"]["configured"] = False
+    workers = await inspector.exec_external_method("ATJoint", "get_workers", {}, auth_token=token)
+    scraped = await asyncio.gather(
+        *(inspector.exec_external_method(worker, "get_metrics", {}, auth_token=token) for worker in workers),
+        return_exceptions=True,
+    )
+    for worker, text in zip(workers, scraped):
+        if isinstance(text, Exception):
+            logger.warning("Failed to scrape metrics of %s: %s", worker, text)
         else:
-            result["at_joint"]["configured"] = True
+            texts.append(text)
+    return PlainTextResponse(merge_rendered(texts))
 
-            components = await inspector.exec_external_method("ATJoint", "get_config", {}, auth_token=token)
-            for cmp in result:
-                if cmp in components:
-                    result[cmp]["registered"] = await inspector.check_external_registered(components[cmp])
-                    if result[cmp]["registered"]:
-                        result[cmp]["configured"] = await inspector.check_external_configured(
-                            components[cmp], auth_token=token
-                        )
 
-    return result
+@app.get("/api/connections")
+async def connections(*, token: str):
+    return manager.stats(token)
+
+
+@app.get("/api/history")
+async def history(
+    *,
+    token: str,
+    start: int = 0,
+    end: Optional[int] = None,
+    stage: Optional[List[str]] = Query(None),
+    limit: int = 100,
+    run: Optional[int] = None,
+):
+    inspector = await get_inspector()
+    if not inspector.started:
+        raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Inspector is not started")
+    if not await inspector.check_external_registered("ATJoint"):
+        raise HTTPException(status.HTTP_406_NOT_ACCEPTABLE, detail="ATJoint is not registered")
+
+    return await inspector.exec_external_method(
+        "ATJoint",
+        "get_history",
+        {"start": start, "end": end, "stages": stage, "limit": limit, "run": run},
+        auth_token=token,
+    )
 
 
 @app.websocket("/api/ws")
@@ -254,9 +581,14 @@ async def websocket_endpoint(
     *,
     websocket: WebSocket,
     auth_token: str = Query(...),
+    encoding: str = Query(ENCODING_JSON),
+    keyframe_interval: int = Query(50),
 ):
+    if encoding not in ENCODINGS:
+        await websocket.close(code=status.WS_1003_UNSUPPORTED_DATA)
+        return
     session = str(uuid4())
-    await manager.connect(auth_token, session, websocket)
+    await manager.connect(auth_token, session, websocket, encoding=encoding, keyframe_interval=keyframe_interval)
     try:
         while True:
             await websocket.receive_text()
@@ -269,9 +601,15 @@ async def index(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 
-async def main():
-    args = get_args()
-    inspector = await get_inspector()
+async def start(args: dict = None, profile: StartupProfile = None) -> Optional[asyncio.Task]:
+    profile = profile or StartupProfile()
+    args = GLOBAL.args = get_args() if args is None else args
+    manager.max_queue = args.get("ws_queue_size", manager.max_queue)
+    manager.slow_consumer = args.get("ws_slow_consumer", manager.slow_consumer)
+    manager.lag_threshold = args.get("ws_lag_threshold", manager.lag_threshold)
+    registry.ttl = args.get("registry_snapshot_ttl", registry.ttl)
+    with profile.phase("debugger inspector"):
+        inspector = await get_inspector()
     loop = asyncio.get_event_loop()
     inspector_task = None
     if not inspector.started:
@@ -283,9 +621,10 @@ async def main():
     if not isinstance(debugger_port, int):
         debugger_port = int(debugger_port)
 
-    config = UviConfig(app, debugger_host, debugger_port, loop=loop, ws="websockets")
-    server = Server(config=config)
-    loop.create_task(server.serve())
+    with profile.phase("debugger server"):
+        config = UviConfig(app, debugger_host, debugger_port, loop=loop, ws="websockets")
+        server = Server(config=config)
+        loop.create_task(server.serve())
 
     try:
         if not os.path.exists("/var/run/at_joint_debugger/"):
@@ -296,6 +635,11 @@ async def main():
     except PermissionError:
         pass
 
+    return inspector_task
+
+
+async def main(args: dict = None, profile: StartupProfile = None):
+    inspector_task = await start(args, profile=profile)
     if inspector_task is not None:
         await inspector_task
 
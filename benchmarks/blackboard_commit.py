@@ -0,0 +1,34 @@
+import argparse
+import asyncio
+
+from benchmarks.harness import BenchmarkConfig
+from benchmarks.harness import run_benchmark
+
+
+async def main(tacts: int, latency_ms: float, resources: int):
+    print(f"{'mode':<8} {'tacts':>6} {'rpcs':>7} {'set_items':>10} {'tact ms':>9} {'tacts/s':>9}")
+    for mode in ("stage", "batched"):
+        config = BenchmarkConfig(
+            tacts=tacts,
+            simulation_latency_ms=latency_ms,
+            temporal_solver_latency_ms=latency_ms,
+            solver_latency_ms=latency_ms,
+            blackboard_latency_ms=latency_ms,
+            resources=resources,
+            joint={"blackboard_commit": mode},
+        )
+        result = await run_benchmark(config)
+        set_items = sum(count for name, count in result["rpc_counts"].items() if name.endswith(".set_items"))
+        print(
+            f"{mode:<8} {result['tacts']:>6} {result['rpcs']:>7} {set_items:>10} "
+            f"{result['latency']['tact']['p50_ms']:>9.2f} {result['tacts_per_sec']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-stage and batched blackboard commits")
+    parser.add_argument("--tacts", type=int, default=200)
+    parser.add_argument("--latency-ms", dest="latency_ms", type=float, default=2.0, help="Latency of every fake RPC")
+    parser.add_argument("--resources", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.tacts, args.latency_ms, args.resources))
@@ -0,0 +1,162 @@
+import asyncio
+import random
+from collections import Counter
+from typing import Dict
+
+from at_queue.core.session import ConnectionParameters
+
+from at_joint.core.at_joint import AT_BLACKBOARD
+from at_joint.core.at_joint import AT_SIMULATION
+from at_joint.core.at_joint import AT_SOLVER
+from at_joint.core.at_joint import AT_TEMPORAL_SOLVER
+from at_joint.core.at_joint import ATJoint
+
+
+class FakeComponent:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    async def call(self, method: str, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return await getattr(self, method)(**kwargs)
+
+
+class FakeSimulation(FakeComponent):
+    def __init__(
+        self,
+        latency: float = 0.0,
+        resources: int = 10,
+        parameters: int = 5,
+        changing: float = 1.0,
+        batching: bool = True,
+    ):
+        super().__init__(latency)
+        self.batching = batching
+        self.resources = resources
+        self.parameters = parameters
+        self.changing = changing
+        self.ticks = 0
+        self.processes = 0
+        self.random = random.Random(0)
+
+    async def create_process(self, process_name: str, file_id: str):
+        self.processes += 1
+        self.ticks = 0
+        return {"id": self.processes, "name": process_name, "file_id": file_id}
+
+    async def kill_process(self, process_id: int):
+        return True
+
+    async def run_tick(self, process_id: int):
+        self.ticks += 1
+        resources = []
+        for r in range(self.resources):
+            resource = {"resource_name": f"resource_{r}"}
+            for p in range(self.parameters):
+                changed = self.random.random() < self.changing
+                resource[f"param_{p}"] = self.ticks if changed else 0
+            resources.append(resource)
+        return {"resources": resources}
+
+    async def run_ticks(self, process_id: int, count: int):
+        if not self.batching:
+            raise ValueError("run_ticks is not supported")
+        return {"ticks": [await self.run_tick(process_id) for _ in range(count)]}
+
+
+class FakeBlackboard(FakeComponent):
+    def __init__(self, latency: float = 0.0):
+        super().__init__(latency)
+        self.items: Dict[str, dict] = {}
+        self.written = 0
+
+    async def set_items(self, items: list):
+        self.written += len(items)
+        for item in items:
+            self.items[item["ref"]] = item
+        return True
+
+
+class FakeTemporalSolver(FakeComponent):
+    def __init__(self, latency: float = 0.0, signified: int = 10):
+        super().__init__(latency)
+        self.signified = signified
+        self.tacts = 0
+
+    async def update_wm_from_bb(self):
+        return True
+
+    async def process_tact(self):
+        self.tacts += 1
+        signified = {f"event_{i}": self.tacts % (i + 2) == 0 for i in range(self.signified)}
+        return {"wm": {}, "timeline": {"tacts": []}, "signified": signified, "signified_meta": {}}
+
+    async def reset(self):
+        self.tacts = 0
+        return True
+
+
+class FakeSolver(FakeComponent):
+    def __init__(self, latency: float = 0.0, wm_size: int = 10):
+        super().__init__(latency)
+        self.wm_size = wm_size
+        self.runs = 0
+
+    async def update_wm_from_bb(self):
+        return True
+
+    async def run(self):
+        self.runs += 1
+        wm = {f"fact_{i}": {"content": self.runs % (i + 2), "non_factor": {"belief": 50}} for i in range(self.wm_size)}
+        return {"wm": wm, "trace": {"steps": []}}
+
+    async def reset(self):
+        self.runs = 0
+        return True
+
+
+class FakeATJoint(ATJoint):
+    def __init__(self, components: Dict[str, FakeComponent] = None, *args, **kwargs):
+        super().__init__(ConnectionParameters(), *args, **kwargs)
+        self.components = components or {
+            AT_SIMULATION: FakeSimulation(),
+            AT_BLACKBOARD: FakeBlackboard(),
+            AT_TEMPORAL_SOLVER: FakeTemporalSolver(),
+            AT_SOLVER: FakeSolver(),
+        }
+        self.rpc_counts = Counter()
+
+    async def get_user_id_or_token(self, auth_token: str, raize_on_failed: bool = True):
+        return auth_token
+
+    async def check_external_registered(self, component: str) -> bool:
+        self.rpc_counts[(component, "check_registered")] += 1
+        return component in self.components
+
+    async def check_external_configured(self, component: str, auth_token: str = None) -> bool:
+        self.rpc_counts[(component, "check_configured")] += 1
+        return component in self.components
+
+    async def exec_external_method(self, reciever: str, methode_name: str, method_args: dict, auth_token: str = None):
+        self.rpc_counts[(reciever, methode_name)] += 1
+        component = self.components.get(reciever)
+        if component is None:
+            raise ValueError(f"Component {reciever} is not registered")
+        return await component.call(methode_name, **method_args)
+
+    async def setup(self, auth_token: str = "default"):
+        await self.create(auth_token=auth_token)
+        process = await self.exec_external_method(
+            AT_SIMULATION, "create_process", {"process_name": "runtime_process", "file_id": "fake"}
+        )
+        self.at_simulation_processes[auth_token] = process["id"]
+        self.at_translated_files[auth_token] = "fake"
+        self.rpc_counts.clear()
+
+    @property
+    def total_rpcs(self) -> int:
+        return sum(self.rpc_counts.values())
+
+    def method_rpcs(self, method: str) -> int:
+        return sum(count for (_, name), count in self.rpc_counts.items() if name == method)
@@ -0,0 +1,257 @@
+import argparse
+import asyncio
+import json
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict
+from dataclasses import dataclass
+from dataclasses import field
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+from at_joint.core.at_joint import AT_BLACKBOARD
+from at_joint.core.at_joint import AT_SIMULATION
+from at_joint.core.at_joint import AT_SOLVER
+from at_joint.core.at_joint import AT_TEMPORAL_SOLVER
+from at_joint.core.at_joint import STAGE_SECONDS
+from at_joint.core.at_joint import TACT_SECONDS
+from at_joint.core.metrics import LATENCY_BUCKETS
+from at_joint.core.metrics import Metrics
+from benchmarks.fakes import FakeATJoint
+from benchmarks.fakes import FakeBlackboard
+from benchmarks.fakes import FakeSimulation
+from benchmarks.fakes import FakeSolver
+from benchmarks.fakes import FakeTemporalSolver
+
+
+# status checks are cached with a TTL, so longer runs may legitimately make a few more of them
+RPC_TOLERANCE = 0.02
+
+
+@dataclass
+class BenchmarkConfig:
+    tacts: int = 200
+    users: int = 1
+    simulation_latency_ms: float = 1.0
+    temporal_solver_latency_ms: float = 1.0
+    solver_latency_ms: float = 1.0
+    blackboard_latency_ms: float = 1.0
+    resources: int = 50
+    parameters: int = 5
+    changing: float = 1.0
+    signified: int = 10
+    wm_size: int = 50
+    process_tact: Dict = field(default_factory=lambda: {"wait": 0})
+    joint: Dict = field(default_factory=dict)
+
+
+class RecordingMetrics(Metrics):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.samples: Dict[str, List[float]] = {}
+
+    def observe(self, name: str, value: float, buckets: Tuple[float, ...] = LATENCY_BUCKETS, **labels):
+        super().observe(name, value, buckets=buckets, **labels)
+        if name == STAGE_SECONDS:
+            self.samples.setdefault(labels.get("stage"), []).append(value)
+        elif name == TACT_SECONDS:
+            self.samples.setdefault("tact", []).append(value)
+
+
+def percentiles(values: List[float]) -> dict:
+    if not values:
+        return {}
+    values = sorted(values)
+    pick = lambda q: values[min(int(q * len(values)), len(values) - 1)] * 1000  # noqa: E731
+    return {"p50_ms": pick(0.5), "p90_ms": pick(0.9), "p99_ms": pick(0.99), "max_ms": values[-1] * 1000}
+
+
+def make_joint(config: BenchmarkConfig) -> FakeATJoint:
+    joint = FakeATJoint(
+        components={
+            AT_SIMULATION: FakeSimulation(
+                latency=config.simulation_latency_ms / 1000,
+                resources=config.resources,
+                parameters=config.parameters,
+                changing=config.changing,
+            ),
+            AT_TEMPORAL_SOLVER: FakeTemporalSolver(
+                latency=config.temporal_solver_latency_ms / 1000, signified=config.signified
+            ),
+            AT_SOLVER: FakeSolver(latency=config.solver_latency_ms / 1000, wm_size=config.wm_size),
+            AT_BLACKBOARD: FakeBlackboard(latency=config.blackboard_latency_ms / 1000),
+        },
+        **config.joint,
+    )
+    recording = RecordingMetrics(
+        enabled=joint.metrics.enabled, payload_bytes_sample_every=joint.metrics.payload_bytes_sample_every
+    )
+    recording.descriptions = joint.metrics.descriptions
+    recording.collectors = joint.metrics.collectors
+    joint.metrics = recording
+    return joint
+
+
+async def run_joint(config: BenchmarkConfig) -> Tuple[FakeATJoint, float]:
+    joint = make_joint(config)
+    users = [f"user-{index}" for index in range(config.users)]
+    for user in users:
+        await joint.setup(user)
+    joint.rpc_counts.clear()
+
+    started = time.perf_counter()
+    await asyncio.gather(
+        *(joint.process_tact(iterate=config.tacts, auth_token=user, **config.process_tact) for user in users)
+    )
+    elapsed = time.perf_counter() - started
+    await joint.shutdown()
+    return joint, elapsed
+
+
+async def measure_peak_memory(config: BenchmarkConfig) -> int:
+    # tracing slows every allocation down, so memory is measured in its own untimed pass
+    tracemalloc.start()
+    try:
+        await run_joint(config)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+async def run_benchmark(config: BenchmarkConfig, measure_memory: bool = True) -> dict:
+    joint, elapsed = await run_joint(config)
+    peak = await measure_peak_memory(config) if measure_memory else 0
+
+    tacts = config.tacts * config.users
+    return {
+        "tacts": tacts,
+        "seconds": elapsed,
+        "tacts_per_sec": tacts / elapsed,
+        "rpcs": joint.total_rpcs,
+        "rpcs_per_tact": joint.total_rpcs / tacts,
+        "rpc_counts": {f"{component}.{method}": count for (component, method), count in joint.rpc_counts.items()},
+        "peak_memory_mb": peak / 1024 / 1024,
+        "latency": {stage: percentiles(values) for stage, values in joint.metrics.samples.items()},
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> List[str]:
+    regressions = []
+    if result["tacts_per_sec"] < baseline["tacts_per_sec"] * (1 - tolerance):
+        regressions.append(f"tacts/sec dropped from {baseline['tacts_per_sec']:.1f} to {result['tacts_per_sec']:.1f}")
+    if result["rpcs_per_tact"] > baseline["rpcs_per_tact"] * (1 + RPC_TOLERANCE):
+        regressions.append(f"RPCs per tact grew from {baseline['rpcs_per_tact']:.2f} to {result['rpcs_per_tact']:.2f}")
+    if result["peak_memory_mb"] > baseline["peak_memory_mb"] * (1 + tolerance):
+        regressions.append(
+            f"peak memory grew from {baseline['peak_memory_mb']:.1f} MB to {result['peak_memory_mb']:.1f} MB"
+        )
+    return regressions
+
+
+def report(result: dict):
+    print(f"tacts:          {result['tacts']}")
+    print(f"tacts/sec:      {result['tacts_per_sec']:.1f}")
+    print(f"RPCs per tact:  {result['rpcs_per_tact']:.2f}")
+    print(f"peak memory:    {result['peak_memory_mb']:.1f} MB")
+    print(f"{'latency (ms)':<22}" + "".join(f"{column:>10}" for column in ("p50", "p90", "p99", "max")))
+    for stage, values in sorted(result["latency"].items()):
+        print(f"  {stage:<20}" + "".join(f"{values[key]:>10.2f}" for key in ("p50_ms", "p90_ms", "p99_ms", "max_ms")))
+    print("RPCs")
+    for name, count in sorted(result["rpc_counts"].items()):
+        print(f"  {name:<40}{count:>8}")
+
+
+def parse_option(value: str):
+    key, _, raw = value.partition("=")
+    try:
+        return key, json.loads(raw)
+    except json.JSONDecodeError:
+        return key, raw
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        prog="at-joint-benchmark", description="Benchmark ATJoint.process_tact against in-process fake components"
+    )
+    defaults = BenchmarkConfig()
+    parser.add_argument("--tacts", type=int, default=defaults.tacts)
+    parser.add_argument("--users", type=int, default=defaults.users, help="Number of concurrent process_tact runs")
+    parser.add_argument("--simulation-latency-ms", type=float, default=defaults.simulation_latency_ms)
+    parser.add_argument("--temporal-solver-latency-ms", type=float, default=defaults.temporal_solver_latency_ms)
+    parser.add_argument("--solver-latency-ms", type=float, default=defaults.solver_latency_ms)
+    parser.add_argument("--blackboard-latency-ms", type=float, default=defaults.blackboard_latency_ms)
+    parser.add_argument("--resources", type=int, default=defaults.resources)
+    parser.add_argument("--parameters", type=int, default=defaults.parameters, help="Parameters per resource")
+    parser.add_argument(
+        "--changing", type=float, default=defaults.changing, help="Share of parameters that change every tact"
+    )
+    parser.add_argument("--signified", type=int, default=defaults.signified)
+    parser.add_argument("--wm-size", type=int, default=defaults.wm_size)
+    parser.add_argument(
+        "--process-tact",
+        dest="process_tact",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="process_tact argument, for example pipeline_depth=4, may be repeated",
+    )
+    parser.add_argument(
+        "--joint",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="ATJoint constructor argument, for example blackboard_delta=true, may be repeated",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs to take the median of")
+    parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+    parser.add_argument("--save-baseline", dest="save_baseline", help="Write the result to this file")
+    parser.add_argument("--baseline", help="Compare the result to this file and exit with 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative throughput/memory change")
+    return parser.parse_args()
+
+
+async def main(args) -> int:
+    config = BenchmarkConfig(
+        tacts=args.tacts,
+        users=args.users,
+        simulation_latency_ms=args.simulation_latency_ms,
+        temporal_solver_latency_ms=args.temporal_solver_latency_ms,
+        solver_latency_ms=args.solver_latency_ms,
+        blackboard_latency_ms=args.blackboard_latency_ms,
+        resources=args.resources,
+        parameters=args.parameters,
+        changing=args.changing,
+        signified=args.signified,
+        wm_size=args.wm_size,
+        process_tact={"wait": 0, **dict(parse_option(option) for option in args.process_tact)},
+        joint=dict(parse_option(option) for option in args.joint),
+    )
+    runs = [await run_benchmark(config, measure_memory=False) for _ in range(max(args.repeat, 1))]
+    result = sorted(runs, key=lambda run: run["tacts_per_sec"])[len(runs) // 2]
+    result["peak_memory_mb"] = await measure_peak_memory(config) / 1024 / 1024
+    result["config"] = asdict(config)
+
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        report(result)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main(get_args())))
@@ -0,0 +1,90 @@
+import asyncio
+
+from at_joint.core.at_joint import AT_BLACKBOARD
+from at_joint.core.blackboard import BlackboardDeltaTracker
+from at_joint.core.columnar import ResourceSchema
+from benchmarks.fakes import FakeATJoint
+
+
+def test_tracker_skips_unchanged_items():
+    tracker = BlackboardDeltaTracker()
+    assert tracker.changed([{"ref": "r.p", "value": 1}]) == [{"ref": "r.p", "value": 1}]
+    assert tracker.changed([{"ref": "r.p", "value": 1}]) == []
+    assert tracker.changed([{"ref": "r.p", "value": 2}]) == [{"ref": "r.p", "value": 2}]
+    assert tracker.stats()["skipped"] == 1
+
+
+def test_tracker_sends_type_changes():
+    tracker = BlackboardDeltaTracker()
+    tracker.changed([{"ref": "r.p", "value": 1}, {"ref": "r.q", "value": False}, {"ref": "r.l", "value": [0]}])
+    changed = tracker.changed(
+        [{"ref": "r.p", "value": True}, {"ref": "r.q", "value": 0}, {"ref": "r.l", "value": [False]}]
+    )
+    assert [item["ref"] for item in changed] == ["r.p", "r.q", "r.l"]
+
+
+def test_tracker_frame_sends_type_changes():
+    schema = ResourceSchema()
+    tracker = BlackboardDeltaTracker()
+    tracker.changed_frame(schema.frame([{"resource_name": "r", "p": 1, "q": 2}]))
+    changed = tracker.changed_frame(schema.frame([{"resource_name": "r", "p": True, "q": 2}]))
+    assert changed == [{"ref": "r.p", "value": True}]
+
+
+def test_tracker_resync():
+    tracker = BlackboardDeltaTracker(resync_interval=2)
+    tracker.next_tact()
+    tracker.changed([{"ref": "r.p", "value": 1}])
+    tracker.next_tact()
+    assert tracker.changed([{"ref": "r.p", "value": 1}]) == [{"ref": "r.p", "value": 1}]
+
+
+def test_delta_mode_writes_only_changes():
+    async def run(blackboard_delta):
+        joint = FakeATJoint(blackboard_delta=blackboard_delta)
+        joint.components["ATSimulation"].changing = 0.0
+        await joint.setup()
+        await joint.process_tact(iterate=5, wait=0)
+        return joint.components[AT_BLACKBOARD]
+
+    full, delta = asyncio.run(run(False)), asyncio.run(run(True))
+    assert delta.items == full.items
+    assert delta.written < full.written
+
+
+def test_batched_commit_writes_once_per_tact():
+    async def run():
+        joint = FakeATJoint(blackboard_commit="batched")
+        await joint.setup()
+        await joint.process_tact(iterate=4, wait=0)
+        return joint
+
+    joint = asyncio.run(run())
+    # simulation and solver items of the previous tact, temporal items, and the final flush
+    assert joint.rpc_counts[(AT_BLACKBOARD, "set_items")] == 4 * 2 + 1
+    assert not joint.blackboard_pending
+
+
+def test_batched_commit_drops_items_of_failed_run():
+    async def run():
+        joint = FakeATJoint(blackboard_commit="batched", blackboard_delta=True)
+        await joint.setup()
+        simulation = joint.components["ATSimulation"]
+        run_tick = simulation.run_tick
+
+        async def failing_run_tick(process_id):
+            if simulation.ticks == 2:
+                raise ValueError("simulation failed")
+            return await run_tick(process_id)
+
+        simulation.run_tick = failing_run_tick
+        try:
+            await joint.process_tact(iterate=4, wait=0)
+        except ValueError:
+            pass
+        return joint
+
+    joint = asyncio.run(run())
+    # the solver items of the last tact were pending when the simulation failed
+    assert "default" not in joint.blackboard_pending
+    assert joint.blackboard_trackers["default"].stats()["refs"] == 0
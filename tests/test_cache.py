@@ -0,0 +1,107 @@
+import asyncio
+
+from at_queue.core.at_component import ATComponent
+
+from at_joint.core.at_joint import AT_SOLVER
+from at_joint.core.at_joint import ATJoint
+from at_joint.core.cache import CONFIGURED
+from at_joint.core.cache import REGISTERED
+from at_joint.core.cache import StatusCache
+from at_joint.core.cache import UserIdCache
+from benchmarks.fakes import FakeATJoint
+
+
+def test_status_cache_expires(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("at_joint.core.cache.time.monotonic", lambda: now[0])
+    cache = StatusCache(ttl=5.0)
+    cache.set(REGISTERED, AT_SOLVER, True)
+    assert cache.get(REGISTERED, AT_SOLVER) is True
+    now[0] += 5.0
+    assert cache.get(REGISTERED, AT_SOLVER) is None
+
+
+def test_status_cache_disabled():
+    cache = StatusCache(ttl=0)
+    cache.set(REGISTERED, AT_SOLVER, True)
+    assert cache.get(REGISTERED, AT_SOLVER) is None
+
+
+def test_status_cache_invalidate_token():
+    cache = StatusCache()
+    cache.set(REGISTERED, AT_SOLVER, True)
+    cache.set(CONFIGURED, AT_SOLVER, True, "a")
+    cache.set(CONFIGURED, AT_SOLVER, True, "b")
+    cache.invalidate(auth_token="a")
+    assert cache.get(REGISTERED, AT_SOLVER) is True
+    assert cache.get(CONFIGURED, AT_SOLVER, "a") is None
+    assert cache.get(CONFIGURED, AT_SOLVER, "b") is True
+
+
+def test_ready_checks_are_cached():
+    async def run():
+        joint = FakeATJoint()
+        for _ in range(3):
+            assert await joint.is_component_ready(AT_SOLVER, auth_token="a")
+        return joint.rpc_counts
+
+    rpc_counts = asyncio.run(run())
+    assert rpc_counts[(AT_SOLVER, "check_registered")] == 1
+    assert rpc_counts[(AT_SOLVER, "check_configured")] == 1
+
+
+def test_failed_call_invalidates_status():
+    async def run():
+        joint = FakeATJoint()
+        await joint.is_component_ready(AT_SOLVER, auth_token="a")
+        try:
+            await joint.exec_component_method(AT_SOLVER, "missing", {}, auth_token="a")
+        except Exception:
+            pass
+        return joint.status_cache
+
+    cache = asyncio.run(run())
+    assert cache.get(REGISTERED, AT_SOLVER) is None
+    assert cache.get(CONFIGURED, AT_SOLVER, "a") is None
+
+
+def test_user_id_cache_evicts_least_recently_used():
+    cache = UserIdCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_user_id_cache_expires(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("at_joint.core.cache.time.monotonic", lambda: now[0])
+    cache = UserIdCache(ttl=10.0)
+    cache.set("a", 1)
+    now[0] += 10.0
+    assert cache.get("a") is None
+    assert UserIdCache(ttl=0).get("a") is None
+
+
+def test_user_ids_are_resolved_once(monkeypatch):
+    calls = []
+
+    async def resolve(self, auth_token, raize_on_failed=True):
+        calls.append(auth_token)
+        return 7 if auth_token == "known" else auth_token
+
+    monkeypatch.setattr(ATComponent, "get_user_id_or_token", resolve)
+
+    async def run():
+        joint = FakeATJoint()
+        resolved = [await ATJoint.get_user_id_or_token(joint, token) for token in ("known", "known", "x", "x")]
+        await joint.invalidate_user_id(token="known")
+        resolved.append(await ATJoint.get_user_id_or_token(joint, "known"))
+        return resolved
+
+    assert asyncio.run(run()) == [7, 7, "x", "x", 7]
+    # unresolved tokens are asked for every time
+    assert calls == ["known", "x", "x", "known"]
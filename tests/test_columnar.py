@@ -0,0 +1,32 @@
+from at_joint.core.columnar import ResourceSchema
+
+RESOURCES = [{"resource_name": "tank", "level": 3, "open": True}, {"resource_name": "pump", "speed": 1.5}]
+
+
+def test_frame_round_trip():
+    frame = ResourceSchema().frame(RESOURCES)
+    assert len(frame) == 3
+    assert frame.to_items() == [
+        {"ref": "tank.level", "value": 3},
+        {"ref": "tank.open", "value": True},
+        {"ref": "pump.speed", "value": 1.5},
+    ]
+    assert frame.to_resource_parameters() == [
+        {"name": "tank", "parameters": {"level": 3, "open": True}},
+        {"name": "pump", "parameters": {"speed": 1.5}},
+    ]
+
+
+def test_schema_reuses_columns():
+    schema = ResourceSchema()
+    first = schema.frame(RESOURCES)
+    second = schema.frame([{"resource_name": "pump", "speed": 2.0, "power": 7}, *RESOURCES[:1]])
+    assert list(second.columns) == [2, 3, 0, 1]
+    assert schema.refs == ["tank.level", "tank.open", "pump.speed", "pump.power"]
+    assert first.schema is second.schema
+
+
+def test_empty_resource():
+    frame = ResourceSchema().frame([{"resource_name": "idle"}])
+    assert frame.to_items() == []
+    assert frame.to_resource_parameters() == [{"name": "idle", "parameters": {}}]
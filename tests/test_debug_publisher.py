@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+from at_joint.core.debug_publisher import COALESCE
+from at_joint.core.debug_publisher import DebugPublisher
+from at_joint.core.debug_publisher import DROP_NEWEST
+from at_joint.core.debug_publisher import DROP_OLDEST
+
+
+def publish_all(overflow, messages, max_size=2, sample_every=1):
+    sent = []
+
+    async def send(initiator, data, auth_token):
+        sent.append((initiator, data))
+
+    async def run():
+        publisher = DebugPublisher(send, max_size=max_size, overflow=overflow, sample_every=sample_every)
+        for initiator, data, kwargs in messages:
+            publisher.publish(initiator, data, "token", **kwargs)
+        await publisher.close()
+        return publisher
+
+    return sent, asyncio.run(run())
+
+
+def test_drop_oldest():
+    sent, publisher = publish_all(DROP_OLDEST, [("at_solver", tact, {"tact": tact}) for tact in range(5)])
+    assert sent == [("at_solver", 3), ("at_solver", 4)]
+    assert publisher.dropped == 3
+
+
+def test_drop_newest():
+    sent, _ = publish_all(DROP_NEWEST, [("at_solver", tact, {"tact": tact}) for tact in range(5)])
+    assert sent == [("at_solver", 0), ("at_solver", 1)]
+
+
+def test_coalesce():
+    messages = [(initiator, tact, {"tact": tact}) for tact in range(3) for initiator in ("at_solver", "at_simulation")]
+    sent, publisher = publish_all(COALESCE, messages, max_size=10)
+    assert sent == [("at_solver", 2), ("at_simulation", 2)]
+    assert publisher.coalesced == 4
+
+
+def test_sampling():
+    sent, publisher = publish_all(DROP_OLDEST, [("at_solver", tact, {"tact": tact}) for tact in range(6)], 10, 3)
+    assert sent == [("at_solver", 0), ("at_solver", 3)]
+    assert publisher.sampled_out == 4
+
+
+@pytest.mark.parametrize("overflow", [DROP_OLDEST, DROP_NEWEST, COALESCE])
+def test_control_messages_are_never_dropped(overflow):
+    messages = [("at_solver", tact, {"tact": tact}) for tact in range(3)]
+    messages.insert(1, ("at_joint", {"stop": True}, {"control": True}))
+    messages.append(("at_joint", {"stop": True}, {"control": True, "tact": 1}))
+    sent, _ = publish_all(overflow, messages, max_size=1, sample_every=2)
+    assert sent.count(("at_joint", {"stop": True})) == 2
+
+
+def test_control_messages_have_a_cap_of_their_own():
+    sent = []
+
+    async def send(initiator, data, auth_token):
+        sent.append(data)
+
+    async def run():
+        publisher = DebugPublisher(send, max_size=2, max_control=3)
+        for index in range(10):
+            publisher.publish("at_joint", {"stop": index}, "token", control=True)
+        depth = publisher.stats()["queue_depth"]
+        for tact in range(5):
+            publisher.publish("at_solver", {"tact": tact}, "token", tact=tact)
+        await publisher.close()
+        return depth, publisher
+
+    depth, publisher = asyncio.run(run())
+    assert depth == 3
+    # the newest control messages and the data messages that fit max_size
+    assert sent == [{"stop": 7}, {"stop": 8}, {"stop": 9}, {"tact": 3}, {"tact": 4}]
+    assert publisher.dropped == 7 + 3
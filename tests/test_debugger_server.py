@@ -0,0 +1,126 @@
+import asyncio
+
+from at_joint.debug.server import ConnectionManager
+from at_joint.debug.server import RegistrySnapshot
+from at_joint.debug.server import SLOW_CONSUMER_DISCONNECT
+
+
+class FakeWebSocket:
+    def __init__(self, block: bool = False):
+        self.sent = []
+        self.closed = None
+        self.unblocked = asyncio.Event()
+        if not block:
+            self.unblocked.set()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        await self.unblocked.wait()
+        self.sent.append(text)
+
+    async def send_bytes(self, data):
+        await self.unblocked.wait()
+        self.sent.append(data)
+
+    async def close(self, code=None):
+        self.closed = code
+
+
+def test_sessions_have_their_own_queues():
+    async def run():
+        manager = ConnectionManager(max_queue=2)
+        slow, fast = FakeWebSocket(block=True), FakeWebSocket()
+        await manager.connect("token", "slow", slow)
+        await manager.connect("token", "fast", fast)
+        for index in range(5):
+            await manager.send_message("token", {"initiator": "at_solver", "data": index})
+            await asyncio.sleep(0)
+        stats = manager.stats("token")
+        slow.unblocked.set()
+        await asyncio.sleep(0.01)
+        manager.disconnect("token", "slow")
+        manager.disconnect("token", "fast")
+        return slow, fast, stats
+
+    slow, fast, stats = asyncio.run(run())
+    assert len(fast.sent) == 5
+    # the writer of the slow session holds the first message, the queue keeps the two newest
+    assert len(slow.sent) == 3
+    assert stats["slow"]["dropped"] == 2
+    assert stats["fast"]["dropped"] == 0
+
+
+def test_slow_consumer_is_disconnected():
+    async def run():
+        manager = ConnectionManager(max_queue=1, slow_consumer=SLOW_CONSUMER_DISCONNECT, lag_threshold=0.0)
+        slow = FakeWebSocket(block=True)
+        await manager.connect("token", "slow", slow)
+        for index in range(4):
+            await manager.send_message("token", {"initiator": "at_solver", "data": index})
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return manager, slow
+
+    manager, slow = asyncio.run(run())
+    assert slow.closed is not None
+    assert "token" not in manager.active_connections
+
+
+class FakeInspector:
+    def __init__(self, registered):
+        self.registered = registered
+        self.calls = 0
+
+    async def check_external_registered(self, component):
+        self.calls += 1
+        return component in self.registered
+
+    async def check_external_configured(self, component, auth_token=None):
+        if component not in self.registered:
+            raise ValueError(f"Component {component} is not registered")
+        return True
+
+
+def test_registry_status():
+    async def run():
+        registry = RegistrySnapshot(ttl=60.0)
+        inspector = FakeInspector({"ATSolver"})
+        statuses = [await registry.status(inspector, component, "token") for component in ("ATSolver", "ATMissing")]
+        await registry.status(inspector, "ATSolver", "token")
+        return statuses, inspector.calls
+
+    statuses, calls = asyncio.run(run())
+    assert statuses == [{"registered": True, "configured": True}, {"registered": False}]
+    assert calls == 2
+
+
+def test_registry_prunes_expired_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("at_joint.debug.server.time.monotonic", lambda: now[0])
+
+    async def run():
+        registry = RegistrySnapshot(ttl=1.0)
+        inspector = FakeInspector({"ATSolver"})
+        for token in ("a", "b", "c"):
+            await registry.configured(inspector, "ATSolver", token)
+        now[0] += 2.0
+        await registry.configured(inspector, "ATSolver", "d")
+        return registry
+
+    registry = asyncio.run(run())
+    assert list(registry._entries) == [("token", "d", "configured", "ATSolver")]
+
+
+def test_registry_invalidates_token_entries_only():
+    async def run():
+        registry = RegistrySnapshot(ttl=60.0)
+        # a token that happens to equal a component name
+        inspector = FakeInspector({"ATSolver"})
+        await registry.status(inspector, "ATSolver", "ATSolver")
+        registry.invalidate("ATSolver")
+        return registry
+
+    registry = asyncio.run(run())
+    assert list(registry._entries) == [("registered", "ATSolver")]
@@ -0,0 +1,49 @@
+import json
+import random
+
+import pytest
+
+from at_joint.debug.encoding import DeltaDecoder
+from at_joint.debug.encoding import DeltaEncoder
+from at_joint.debug.encoding import diff
+from at_joint.debug.encoding import get_encoder
+from at_joint.debug.encoding import JsonEncoder
+from at_joint.debug.encoding import OutgoingMessage
+
+
+def random_value(rng, depth=0):
+    kind = rng.randrange(6 if depth < 2 else 4)
+    if kind == 0:
+        return rng.choice([0, 1, True, False, None])
+    if kind == 1:
+        return rng.choice([0.0, 1.0, 2, "a", "b"])
+    if kind == 2:
+        return rng.randrange(3)
+    if kind == 3:
+        return rng.choice([True, False])
+    if kind == 4:
+        return [random_value(rng, depth + 1) for _ in range(rng.randrange(3))]
+    return {f"k{index}": random_value(rng, depth + 1) for index in range(rng.randrange(4))}
+
+
+def test_diff_sees_type_changes():
+    assert diff({"a": 1}, {"a": True}) == [["s", ["a"], True]]
+    assert diff({"a": [0]}, {"a": [False]}) == [["s", ["a"], [False]]]
+    assert diff(False, 0) == [["s", [], 0]]
+    assert diff({"a": 1}, {"a": 1}) == []
+
+
+def test_delta_round_trip():
+    rng = random.Random(0)
+    encoder, decoder = DeltaEncoder(keyframe_interval=10), DeltaDecoder()
+    for _ in range(500):
+        data = {"wm": random_value(rng), "flag": rng.choice([0, 1, True, False])}
+        message = OutgoingMessage({"initiator": "at_solver", "data": data})
+        decoded = decoder.decode(encoder.encode(message))
+        assert json.dumps(decoded["data"], sort_keys=True) == json.dumps(data, sort_keys=True)
+
+
+def test_get_encoder():
+    assert isinstance(get_encoder("json"), JsonEncoder)
+    with pytest.raises(ValueError):
+        get_encoder("xml")
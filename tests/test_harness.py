@@ -0,0 +1,31 @@
+import asyncio
+import tracemalloc
+
+from benchmarks import harness
+from benchmarks.harness import BenchmarkConfig
+from benchmarks.harness import compare
+from benchmarks.harness import run_benchmark
+
+
+def test_timed_pass_is_not_traced(monkeypatch):
+    traced = []
+    run_joint = harness.run_joint
+
+    async def recording_run_joint(config):
+        traced.append(tracemalloc.is_tracing())
+        return await run_joint(config)
+
+    monkeypatch.setattr(harness, "run_joint", recording_run_joint)
+    config = BenchmarkConfig(tacts=5, resources=5, parameters=2, simulation_latency_ms=0, solver_latency_ms=0)
+    result = asyncio.run(run_benchmark(config))
+    assert traced == [False, True]
+    assert result["tacts"] == 5
+    assert result["peak_memory_mb"] > 0
+    assert "tact" in result["latency"]
+
+
+def test_compare_reports_regressions():
+    baseline = {"tacts_per_sec": 100.0, "rpcs_per_tact": 6.0, "peak_memory_mb": 10.0}
+    assert compare(dict(baseline), baseline, 0.15) == []
+    result = {"tacts_per_sec": 80.0, "rpcs_per_tact": 7.0, "peak_memory_mb": 12.0}
+    assert len(compare(result, baseline, 0.15)) == 3
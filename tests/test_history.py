@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from at_joint.core.history import history_name
+from at_joint.core.history import HistoryStore
+from at_joint.core.history import TactHistory
+from benchmarks.fakes import FakeATJoint
+
+
+def entry(value):
+    return {"at_simulation": [{"name": "r", "parameters": {"p": value}}], "at_solver": {"value": value}}
+
+
+def test_interleaved_runs(tmp_path):
+    history = TactHistory(str(tmp_path))
+    first, second = history.next_run(), history.next_run()
+    for tact in range(3):
+        history.append(tact, entry(tact), run=first)
+        history.append(tact, entry(100 + tact), run=second)
+
+    records = list(history.iter_run(second, start=1, stages=["at_solver"], chunk_size=1))
+    assert [(record["run"], record["tact"]) for record in records] == [(second, 1), (second, 2)]
+    assert [record["at_solver"]["value"] for record in records] == [101, 102]
+    assert "at_simulation" not in records[0]
+    history.close()
+
+    reopened = TactHistory(str(tmp_path))
+    assert reopened.run == second
+    assert list(reopened.run_positions(first)) == [0, 2, 4]
+    reopened.close()
+
+
+def test_query_pages_one_run(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    history = store.get("token")
+    first, second = history.next_run(), history.next_run()
+    for tact in range(5):
+        history.append(tact, entry(tact), run=first)
+        history.append(tact, entry(tact), run=second)
+
+    page = store.query("token", run=first, start=1, limit=2)
+    assert page["total"] == 5
+    assert [record["tact"] for record in page["records"]] == [1, 2]
+    assert {record["run"] for record in page["records"]} == {first}
+    assert page["next"] == 3
+    assert store.query("token", run=first, start=3, end=5)["next"] is None
+    assert store.query("token", limit=3)["total"] == 10
+    with pytest.raises(ValueError):
+        store.query("token", stages=["unknown"])
+    store.close()
+
+
+def test_concurrent_runs_are_recorded_apart(tmp_path):
+    async def run():
+        joint = FakeATJoint(history_dir=str(tmp_path))
+        await joint.setup()
+        await asyncio.gather(joint.process_tact(iterate=4, wait=0), joint.process_tact(iterate=6, wait=0))
+        pages = [await joint.get_history(run=run) for run in (1, 2)]
+        await joint.shutdown()
+        return pages
+
+    pages = asyncio.run(run())
+    assert sorted(page["total"] for page in pages) == [4, 6]
+    for page in pages:
+        assert [record["tact"] for record in page["records"]] == list(range(page["total"]))
+
+
+def test_history_directories_are_not_shared(tmp_path):
+    assert history_name(7) == "7"
+    assert history_name("default") == "default"
+    name = history_name("secret-token")
+    assert "secret" not in name
+    # the full digest, not the short label used in metrics
+    assert len(name) == len("token-") + 64
+
+    store = HistoryStore(str(tmp_path))
+    store.get("a").append(0, entry(1), run=1)
+    assert store.query("b")["total"] == 0
+    assert store.get("a") is not store.get("b")
+    store.close()
+
+
+def test_run_range_is_in_tact_numbers(tmp_path):
+    async def run():
+        joint = FakeATJoint(history_dir=str(tmp_path))
+        await joint.setup()
+        await joint.process_tact(iterate=10, wait=0)
+        # the replay records the tact numbers 4 to 8 of the original run
+        await joint.replay(run=1, start=4, end=9)
+        pages = [
+            await joint.get_history(run=2, start=5, end=8, limit=2),
+            await joint.get_history(run=2, start=7, limit=2),
+        ]
+        replayed = await joint.replay(run=2, start=6, end=8)
+        await joint.shutdown()
+        return pages, replayed
+
+    (page, last), replayed = asyncio.run(run())
+    assert page["total"] == 5
+    assert [record["tact"] for record in page["records"]] == [5, 6]
+    assert page["next"] == 7
+    assert [record["tact"] for record in last["records"]] == [7, 8]
+    assert last["next"] is None
+    assert [tact["tact"] for tact in replayed] == [6, 7]
@@ -0,0 +1,63 @@
+import asyncio
+
+from at_joint.core.at_joint import AT_SOLVER
+from at_joint.core.at_joint import AT_TEMPORAL_SOLVER
+from at_joint.core.memo import StageMemo
+from benchmarks.fakes import FakeATJoint
+
+TACT = [{"name": "tank", "parameters": {"level": 1}}]
+
+
+def test_cached_results_are_copies():
+    memo = StageMemo(components=[AT_SOLVER])
+    result = {"wm": {"fact": {"content": 1}}}
+    memo.set("user", AT_SOLVER, "digest", result)
+    result["wm"].clear()
+    cached = memo.get("user", AT_SOLVER, "digest")
+    cached["wm"]["fact"]["content"] = 2
+    assert memo.get("user", AT_SOLVER, "digest") == {"wm": {"fact": {"content": 1}}}
+
+
+def test_lru_and_forget():
+    memo = StageMemo(components=[AT_SOLVER], max_size=2)
+    for digest in ("a", "b", "c"):
+        memo.set("user", AT_SOLVER, digest, digest)
+    assert memo.get("user", AT_SOLVER, "a") is None
+    memo.set("other", AT_SOLVER, "a", "a")
+    memo.forget("user")
+    assert memo.stats()["size"] == 1
+    assert not StageMemo(components=[AT_SOLVER], max_size=0).enabled(AT_SOLVER)
+
+
+def test_previous_solver_items_are_part_of_the_key():
+    async def run():
+        joint = FakeATJoint(memoize=[AT_TEMPORAL_SOLVER, AT_SOLVER])
+        await joint.setup()
+        # the second tact sees the solver items of the first one on the blackboard
+        await joint.replay(tacts=[TACT, TACT])
+        first = joint.memo.stats()
+        await joint.reset()
+        await joint.replay(tacts=[TACT, TACT])
+        return first, joint.memo.stats()
+
+    first, second = asyncio.run(run())
+    assert first["skipped"] == {}
+    assert first["computed"] == {AT_TEMPORAL_SOLVER: 2, AT_SOLVER: 2}
+    # reset drops the cache, so the second replay computes everything again
+    assert second["computed"] == {AT_TEMPORAL_SOLVER: 4, AT_SOLVER: 4}
+
+
+def test_replayed_run_reuses_results():
+    async def run():
+        joint = FakeATJoint(memoize=[AT_TEMPORAL_SOLVER, AT_SOLVER])
+        # without working memory the solver writes no items, so the blackboard is the same for both replays
+        joint.components[AT_SOLVER].wm_size = 0
+        await joint.setup()
+        first = await joint.replay(tacts=[TACT])
+        first[0]["at_temporal_solver"]["signified"].clear()
+        second = await joint.replay(tacts=[TACT])
+        return joint, second
+
+    joint, second = asyncio.run(run())
+    assert joint.memo.stats()["skipped"] == {AT_TEMPORAL_SOLVER: 1, AT_SOLVER: 1}
+    assert second[0]["at_temporal_solver"]["signified"]
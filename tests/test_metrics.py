@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+from at_joint.core.metrics import COUNTER
+from at_joint.core.metrics import merge_rendered
+from at_joint.core.metrics import Metrics
+from at_joint.core.metrics import user_label
+from benchmarks.fakes import FakeATJoint
+
+
+def test_render():
+    metrics = Metrics()
+    metrics.describe("calls_total", COUNTER, "Calls")
+    metrics.inc("calls_total", component="ATSolver")
+    metrics.observe("latency", 0.003, stage="run")
+    text = metrics.render(labels={"worker": "ATJoint-1"})
+    assert "# HELP calls_total Calls" in text
+    assert 'calls_total{worker="ATJoint-1",component="ATSolver"} 1' in text
+    assert 'latency_bucket{worker="ATJoint-1",stage="run",le="0.005"} 1' in text
+    assert 'latency_count{worker="ATJoint-1",stage="run"} 1' in text
+
+
+def test_disabled_metrics_record_nothing():
+    metrics = Metrics(enabled=False)
+    metrics.inc("calls_total")
+    metrics.observe("latency", 0.003)
+    assert metrics.render() == "\n"
+
+
+def test_merge_rendered_groups_families():
+    texts = []
+    for worker in ("ATJoint", "ATJoint-1"):
+        metrics = Metrics()
+        metrics.describe("calls_total", COUNTER, "Calls")
+        metrics.inc("calls_total")
+        metrics.set("depth", 1)
+        texts.append(metrics.render(labels={"worker": worker}))
+    lines = merge_rendered(texts).splitlines()
+    assert lines == [
+        "# HELP calls_total Calls",
+        "# TYPE calls_total counter",
+        'calls_total{worker="ATJoint"} 1',
+        'calls_total{worker="ATJoint-1"} 1',
+        "# TYPE depth gauge",
+        'depth{worker="ATJoint"} 1',
+        'depth{worker="ATJoint-1"} 1',
+    ]
+
+
+def test_tokens_are_not_exported():
+    assert user_label("default") == "default"
+    assert user_label(42) == "42"
+    assert user_label("secret-token").startswith("token-")
+    assert "secret" not in user_label("secret-token")
+
+
+def test_process_tact_metrics():
+    async def run():
+        joint = FakeATJoint()
+        await joint.setup()
+        await joint.process_tact(iterate=3, wait=0)
+        return await joint.get_metrics(fmt="json"), await joint.get_metrics(), await joint.get_workers()
+
+    snapshot, text, workers = asyncio.run(run())
+    tacts = snapshot["histograms"]["at_joint_tact_seconds"]
+    assert tacts[0]["count"] == 3
+    assert "worker=" not in text
+    assert workers == ["ATJoint"]
+
+
+def test_connection_metrics_have_no_session_label():
+    from at_joint.debug.server import ClientSession
+    from at_joint.debug.server import collect_connection_metrics
+    from at_joint.debug.server import manager
+
+    manager.active_connections["token"] = {"a": ClientSession(None, 10), "b": ClientSession(None, 10)}
+    try:
+        samples = list(collect_connection_metrics())
+    finally:
+        manager.active_connections.pop("token")
+    sessions = [sample for sample in samples if sample[0] == "at_joint_debugger_ws_sessions"]
+    assert sessions == [("at_joint_debugger_ws_sessions", "gauge", {"user": user_label("token")}, 2)]
+    assert all("session" not in labels for _, _, labels, _ in samples)
+
+
+class FakeInspector:
+    started = True
+
+    def __init__(self, configured):
+        self.configured = configured
+        self.calls = []
+
+    async def check_external_registered(self, component):
+        return True
+
+    async def check_external_configured(self, component, auth_token=None):
+        return auth_token in self.configured
+
+    async def exec_external_method(self, component, method, args, auth_token=None):
+        self.calls.append((component, method))
+        if method == "get_workers":
+            return ["ATJoint", "ATJoint-1"]
+        return f'# TYPE calls_total counter\ncalls_total{{worker="{component}"}} 1\n'
+
+
+def test_metrics_endpoint_checks_the_token(monkeypatch):
+    from fastapi import HTTPException
+
+    from at_joint.debug import server
+
+    inspector = FakeInspector({"token"})
+
+    async def get_inspector():
+        return inspector
+
+    monkeypatch.setattr(server, "get_inspector", get_inspector)
+    anonymous = asyncio.run(server.metrics(token=None)).body.decode()
+    assert "calls_total" not in anonymous
+    assert inspector.calls == []
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(server.metrics(token="stranger"))
+    assert raised.value.status_code == 403
+    text = asyncio.run(server.metrics(token="token")).body.decode()
+    assert 'calls_total{worker="ATJoint-1"} 1' in text
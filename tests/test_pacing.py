@@ -0,0 +1,63 @@
+import asyncio
+
+import pytest
+
+from at_joint.core.pacing import OVERRUN_CATCH_UP
+from at_joint.core.pacing import OVERRUN_SKIP
+from at_joint.core.pacing import OVERRUN_STRETCH
+from at_joint.core.pacing import TactPacer
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+
+    async def sleep(seconds):
+        now[0] += seconds
+
+    monkeypatch.setattr("at_joint.core.pacing.time.monotonic", lambda: now[0])
+    monkeypatch.setattr("at_joint.core.pacing.asyncio.sleep", sleep)
+    return now
+
+
+def run_tacts(clock, overrun, durations):
+    # durations are the seconds every tact takes after its start
+    pacer = TactPacer(1.0, overrun=overrun)
+    starts = []
+
+    async def run():
+        for duration in durations:
+            await pacer.wait()
+            starts.append(clock[0])
+            clock[0] += duration
+
+    asyncio.run(run())
+    return pacer, starts
+
+
+def test_fixed_rate(clock):
+    pacer, starts = run_tacts(clock, OVERRUN_CATCH_UP, [0.2, 0.5, 0.1])
+    assert starts == [0.0, 1.0, 2.0]
+    assert pacer.overruns == 0
+
+
+def test_catch_up(clock):
+    pacer, starts = run_tacts(clock, OVERRUN_CATCH_UP, [2.5, 0.1, 0.1, 0.1])
+    assert starts == [0.0, 2.5, 2.6, 3.0]
+    assert pacer.overruns == 2
+
+
+def test_skip(clock):
+    pacer, starts = run_tacts(clock, OVERRUN_SKIP, [2.5, 0.1, 0.1])
+    assert starts == [0.0, 2.5, 3.0]
+    assert pacer.skipped == 1
+
+
+def test_stretch(clock):
+    pacer, starts = run_tacts(clock, OVERRUN_STRETCH, [2.5, 0.1, 0.1])
+    assert starts == [0.0, 2.5, 3.5]
+
+
+def test_unknown_overrun():
+    with pytest.raises(ValueError):
+        TactPacer(1.0, overrun="later")
@@ -0,0 +1,38 @@
+import asyncio
+
+from at_joint.core.at_joint import PIPELINE_QUEUE_DEPTH
+from benchmarks.fakes import FakeATJoint
+from benchmarks.fakes import FakeSimulation
+
+
+def run_process_tact(**kwargs):
+    async def run():
+        joint = FakeATJoint()
+        joint.components["ATSimulation"] = FakeSimulation(latency=0.001, resources=2, parameters=2)
+        depths = []
+        set_metric = joint.metrics.set
+
+        def record(name, value, **labels):
+            if name == PIPELINE_QUEUE_DEPTH:
+                depths.append(value)
+            set_metric(name, value, **labels)
+
+        joint.metrics.set = record
+        await joint.setup()
+        return await joint.process_tact(iterate=6, wait=0, **kwargs), depths
+
+    return asyncio.run(run())
+
+
+def test_pipeline_depth_keeps_results_in_order():
+    sequential, _ = run_process_tact(pipeline_depth=0)
+    pipelined, _ = run_process_tact(pipeline_depth=3)
+    assert [entry["tact"] for entry in pipelined] == list(range(6))
+    assert pipelined == sequential
+
+
+def test_pipeline_depth_bounds_fetched_ticks():
+    _, depths = run_process_tact(pipeline_depth=2)
+    assert max(depths) <= 2
+    _, depths = run_process_tact(pipeline_depth=0)
+    assert max(depths) == 0
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+from at_config.core.at_config_handler import ATComponentConfig
+
+from at_joint.core.at_joint import AT_SIMULATION
+from at_joint.core.process_pool import SimulationProcessPool
+from benchmarks.fakes import FakeATJoint
+
+
+class FakeProcesses:
+    def __init__(self):
+        self.created = 0
+        self.killed = []
+        self.unblocked = asyncio.Event()
+        self.unblocked.set()
+
+    async def create(self, component, file_id, auth_token):
+        await self.unblocked.wait()
+        self.created += 1
+        return self.created
+
+    async def kill(self, component, process_id, auth_token):
+        self.killed.append(process_id)
+
+
+def test_take_uses_spares():
+    async def run():
+        processes = FakeProcesses()
+        pool = SimulationProcessPool(processes.create, processes.kill, size=2)
+        assert pool.take("sim", "file", "token") is None
+        await asyncio.sleep(0)
+        taken = pool.take("sim", "file", "token")
+        await pool.close()
+        return pool, processes, taken
+
+    pool, processes, taken = asyncio.run(run())
+    assert taken == 1
+    assert pool.stats()["hits"] == 1
+    # the spare left and the one created in its place are killed on close
+    assert sorted(processes.killed) == [2, 3]
+
+
+def test_process_created_after_close_is_killed():
+    async def run():
+        processes = FakeProcesses()
+        processes.unblocked.clear()
+        pool = SimulationProcessPool(processes.create, processes.kill, size=1)
+        pool.take("sim", "file", "token")
+        closing = asyncio.ensure_future(pool.close())
+        await asyncio.sleep(0)
+        processes.unblocked.set()
+        await closing
+        pool.refill("sim", "file", "token")
+        return pool, processes
+
+    pool, processes = asyncio.run(run())
+    assert processes.killed == [1]
+    assert pool.stats()["spares"] == 0
+    assert pool.stats()["creating"] == 0
+
+
+def test_shutdown_kills_spare_processes():
+    async def run():
+        joint = FakeATJoint(process_pool_size=1)
+        await joint.setup()
+        await joint.reset()
+        await asyncio.sleep(0)
+        await joint.shutdown()
+        return joint
+
+    joint = asyncio.run(run())
+    # the replaced process and the spare created for the next reset
+    assert joint.rpc_counts[(AT_SIMULATION, "kill_process")] == 2
+    assert joint.process_pool.stats()["spares"] == 0
+
+
+class Item:
+    def __init__(self, data):
+        self.data = data
+
+
+@pytest.mark.parametrize("process_pool_size", [0, 1])
+def test_reconfiguration_kills_the_previous_process(process_pool_size):
+    config = ATComponentConfig(items={"at_simulation_file": Item("model")})
+
+    async def run():
+        joint = FakeATJoint(process_pool_size=process_pool_size)
+        simulation = joint.components[AT_SIMULATION]
+        killed = []
+        kill_process = simulation.kill_process
+
+        async def recording_kill_process(process_id):
+            killed.append(process_id)
+            return await kill_process(process_id)
+
+        simulation.kill_process = recording_kill_process
+        await joint.perform_configurate(config, auth_token="token")
+        first = joint.at_simulation_processes["token"]
+        await joint.perform_configurate(config, auth_token="token")
+        second = joint.at_simulation_processes["token"]
+        await asyncio.sleep(0)
+        killed_before_shutdown = list(killed)
+        await joint.shutdown()
+        return first, second, killed_before_shutdown
+
+    first, second, killed = asyncio.run(run())
+    assert first != second
+    assert killed == [first]
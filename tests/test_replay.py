@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from at_joint.core.at_joint import AT_BLACKBOARD
+from at_joint.core.at_joint import AT_SIMULATION
+from benchmarks.fakes import FakeATJoint
+
+
+def test_replay_history_run(tmp_path):
+    async def run():
+        joint = FakeATJoint(history_dir=str(tmp_path))
+        await joint.setup()
+        recorded = await joint.process_tact(iterate=4, wait=0)
+        ticks = joint.rpc_counts[(AT_SIMULATION, "run_tick")]
+        replayed = await joint.replay(run=1, start=1, end=3)
+        assert joint.rpc_counts[(AT_SIMULATION, "run_tick")] == ticks
+        page = await joint.get_history(run=2)
+        await joint.shutdown()
+        return recorded, replayed, page
+
+    recorded, replayed, page = asyncio.run(run())
+    assert [tact["tact"] for tact in replayed] == [1, 2]
+    assert [tact["at_simulation"] for tact in replayed] == [tact["at_simulation"] for tact in recorded[1:3]]
+    # a replay is recorded as a run of its own
+    assert page["total"] == 2
+
+
+def test_replay_inline_tacts():
+    tacts = [[{"name": "tank", "parameters": {"level": level}}] for level in range(3)]
+
+    async def run():
+        joint = FakeATJoint()
+        await joint.setup()
+        return joint, await joint.replay(tacts=tacts, pipeline_depth=2)
+
+    joint, replayed = asyncio.run(run())
+    assert [tact["at_simulation"] for tact in replayed] == tacts
+    assert joint.components[AT_BLACKBOARD].items["tank.level"]["value"] == 2
+    assert joint.rpc_counts[(AT_SIMULATION, "run_tick")] == 0
+
+
+def test_replay_arguments():
+    joint = FakeATJoint()
+    with pytest.raises(ValueError):
+        asyncio.run(joint.replay())
+    with pytest.raises(ValueError):
+        asyncio.run(joint.replay(tacts=[], run=1))
+    with pytest.raises(ValueError, match="history"):
+        asyncio.run(joint.replay(run=1))
@@ -0,0 +1,120 @@
+import asyncio
+
+import pytest
+
+from at_joint.core.results import get_projection
+from at_joint.core.results import project
+from at_joint.core.results import TactResults
+from at_joint.core.results import VERBOSITY_TACT
+from at_joint.core.results import VERBOSITY_WM
+from benchmarks.fakes import FakeATJoint
+
+
+def test_keep_last():
+    async def run(keep_last):
+        result = TactResults(keep_last=keep_last)
+        for tact in range(5):
+            await result.append({"tact": tact})
+        return result
+
+    assert [entry["tact"] for entry in asyncio.run(run(None)).result()] == [0, 1, 2, 3, 4]
+    assert [entry["tact"] for entry in asyncio.run(run(2)).result()] == [3, 4]
+    nothing = asyncio.run(run(0))
+    assert nothing.result() == []
+    assert nothing.total == 5
+
+
+def test_sink_gets_chunks_in_order():
+    chunks = []
+
+    async def sink(tacts):
+        await asyncio.sleep(0.001 * (3 - len(chunks) % 3))
+        chunks.append([tact["tact"] for tact in tacts])
+
+    async def run():
+        result = TactResults(sink=sink, chunk_size=2)
+        for tact in range(7):
+            await result.append({"tact": tact})
+        await result.close()
+
+    asyncio.run(run())
+    assert chunks == [[0, 1], [2, 3], [4, 5], [6]]
+
+
+def test_slow_sink_holds_the_run_back():
+    started = []
+    finished = []
+
+    async def sink(tacts):
+        started.append(tacts[0]["tact"])
+        await asyncio.sleep(0.01)
+        finished.append(tacts[0]["tact"])
+
+    async def run():
+        result = TactResults(sink=sink, max_pending=2)
+        for tact in range(10):
+            await result.append({"tact": tact})
+            assert tact - len(finished) <= 2
+        await result.close()
+
+    asyncio.run(run())
+    assert finished == list(range(10))
+
+
+def test_failed_sink_stops_the_run():
+    debug = []
+
+    async def run():
+        joint = FakeATJoint()
+        await joint.setup()
+
+        async def sink(tacts):
+            raise ValueError("sink is gone")
+
+        async def record_debug(initiator, data, auth_token, tact=None, control=False):
+            debug.append((initiator, data))
+
+        joint.debug = record_debug
+        with pytest.raises(ValueError):
+            await joint.process_tact(iterate=50, wait=0, sink=sink)
+        return joint
+
+    joint = asyncio.run(run())
+    assert joint.components["ATSimulation"].ticks < 50
+    assert debug[-1] == ("at_joint", {"stop": True})
+
+
+def test_projection_fields():
+    assert get_projection() is None
+    assert get_projection(verbosity=VERBOSITY_TACT) == {}
+    projection = get_projection(["at_solver.wm", "at_temporal_solver", "at_temporal_solver.timeline"])
+    assert projection == {"at_solver": {"wm"}, "at_temporal_solver": None}
+    entry = {"tact": 3, "schedule": {}, "at_simulation": [], "at_solver": {"wm": {}, "trace": {}}}
+    assert project(entry, projection) == {"tact": 3, "schedule": {}, "at_solver": {"wm": {}}}
+    for fields in (["at_simulation.resources"], ["at_unknown"]):
+        with pytest.raises(ValueError):
+            get_projection(fields)
+    with pytest.raises(ValueError):
+        get_projection(verbosity="everything")
+
+
+def test_projected_run_is_recorded_in_full(tmp_path):
+    pushed = []
+
+    async def sink(tacts):
+        pushed.extend(tacts)
+
+    async def run():
+        joint = FakeATJoint(history_dir=str(tmp_path))
+        await joint.setup()
+        result = await joint.process_tact(iterate=2, wait=0, verbosity=VERBOSITY_WM, sink=sink)
+        page = await joint.get_history(run=1)
+        await joint.shutdown()
+        return result, page
+
+    result, page = asyncio.run(run())
+    assert [set(tact) for tact in result] == [{"tact", "at_solver"}] * 2
+    assert set(result[0]["at_solver"]) == {"wm"}
+    assert pushed == result
+    assert page["records"][0]["at_simulation"]
+    assert set(page["records"][0]["at_solver"]) == {"wm", "trace"}
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from at_joint.core.at_joint import AT_SIMULATION
+from benchmarks.fakes import FakeATJoint
+
+
+def run_joint(batching=True, run_ticks=None, run_tick=None, iterate=8):
+    async def run():
+        joint = FakeATJoint(simulation_batch_size=4)
+        simulation = joint.components[AT_SIMULATION]
+        simulation.batching = batching
+        if run_ticks is not None:
+            simulation.run_ticks = run_ticks
+        if run_tick is not None:
+            simulation.run_tick = run_tick
+        await joint.setup()
+        try:
+            return joint, await joint.process_tact(iterate=iterate, wait=0)
+        except Exception as e:
+            return joint, e
+
+    return asyncio.run(run())
+
+
+def test_ticks_are_fetched_in_batches():
+    joint, result = run_joint()
+    assert [tact["tact"] for tact in result] == list(range(8))
+    assert joint.rpc_counts[(AT_SIMULATION, "run_ticks")] == 2
+    assert joint.rpc_counts[(AT_SIMULATION, "run_tick")] == 0
+
+
+def test_unsupported_run_ticks_falls_back():
+    joint, result = run_joint(batching=False)
+    assert len(result) == 8
+    assert joint.rpc_counts[(AT_SIMULATION, "run_ticks")] == 1
+    assert joint.rpc_counts[(AT_SIMULATION, "run_tick")] == 8
+    assert AT_SIMULATION in joint.batch_unsupported
+
+
+@pytest.mark.parametrize("error", [ConnectionError, asyncio.TimeoutError])
+def test_transport_errors_are_not_a_downgrade(error):
+    async def run_ticks(process_id, count):
+        raise error()
+
+    joint, result = run_joint(run_ticks=run_ticks)
+    assert isinstance(result, error)
+    assert joint.rpc_counts[(AT_SIMULATION, "run_tick")] == 0
+    assert AT_SIMULATION not in joint.batch_unsupported
+
+
+def test_failing_simulation_is_not_a_downgrade():
+    async def run_tick(process_id):
+        raise ValueError("process is gone")
+
+    joint, result = run_joint(batching=False, run_tick=run_tick)
+    assert isinstance(result, ValueError)
+    assert AT_SIMULATION not in joint.batch_unsupported
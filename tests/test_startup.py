@@ -0,0 +1,30 @@
+import logging
+
+import pytest
+
+from at_joint.core.startup import StartupProfile
+
+
+def test_phases_are_reported_in_start_order():
+    profile = StartupProfile(enabled=True)
+    with profile.phase("outer"):
+        with profile.phase("inner"):
+            pass
+    with pytest.raises(ValueError):
+        with profile.phase("failing"):
+            raise ValueError()
+
+    assert [name for name, _, _ in profile.phases] == ["inner", "outer", "failing"]
+    lines = profile.report().splitlines()
+    assert [line.split()[0] for line in lines] == ["phase", "outer", "inner", "failing", "total"]
+
+
+def test_disabled_profile_does_not_log(caplog):
+    caplog.set_level(logging.INFO)
+    profile = StartupProfile()
+    with profile.phase("phase"):
+        pass
+    profile.log()
+    assert not caplog.records
+    StartupProfile(enabled=True).log()
+    assert "Startup profile" in caplog.text
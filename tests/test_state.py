@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+import pytest
+
+from at_joint.core.state import get_state_backend
+from at_joint.core.state import STATE_SQLITE
+from at_joint.core.state import StateBackend
+from benchmarks.fakes import FakeATJoint
+
+
+def test_sqlite_claims_are_atomic(tmp_path):
+    path = str(tmp_path / "state.db")
+    first, second = get_state_backend(STATE_SQLITE, path), get_state_backend(STATE_SQLITE, path)
+    owners, other = first.mapping("owners"), second.mapping("owners")
+    assert owners.setdefault("user", "ATJoint") == "ATJoint"
+    assert other.setdefault("user", "ATJoint-1") == "ATJoint"
+    assert other.replace("user", "ATJoint-2", "ATJoint-1") == "ATJoint"
+    assert other.replace("user", "ATJoint", "ATJoint-1") == "ATJoint-1"
+    assert owners["user"] == "ATJoint-1"
+    first.close()
+    second.close()
+
+
+def test_state_backend_arguments():
+    with pytest.raises(ValueError):
+        get_state_backend(STATE_SQLITE)
+    with pytest.raises(ValueError):
+        get_state_backend("redis")
+    with pytest.raises(ValueError):
+        FakeATJoint(worker_id=1)
+
+
+def make_workers(tmp_path):
+    path = str(tmp_path / "state.db")
+    workers = [FakeATJoint(state_backend=STATE_SQLITE, state_path=path, worker_id=worker_id) for worker_id in (0, 1)]
+    for worker in workers:
+        worker.workers[worker.worker_name] = time.time()
+    return workers
+
+
+def test_route_agrees_on_owner(tmp_path):
+    first, second = make_workers(tmp_path)
+    owner = first.route("user")
+    assert owner is None
+    assert second.route("user") == first.worker_name
+    # users of a worker without a heartbeat are taken over
+    first.workers[first.worker_name] = 0
+    assert second.route("user") is None
+    assert first.owners["user"] == second.worker_name
+
+
+def test_owner_forgets_user_configured_elsewhere(tmp_path):
+    first, second = make_workers(tmp_path)
+    assert first.route("user") is None
+    first.get_resource_schema("user")
+    assert first.route("user") is None
+    assert "user" in first.resource_schemas
+
+    second.config_generations["user"] = "generation"
+    assert first.route("user") is None
+    assert "user" not in first.resource_schemas
+
+
+def test_shutdown_stops_heartbeat(tmp_path):
+    async def run(worker):
+        await worker.start()
+        return worker
+
+    worker = asyncio.run(run(make_workers(tmp_path)[0]))
+    assert worker.heartbeat_task is None
+    assert worker.worker_name not in worker.workers
+
+
+def test_incomplete_backend_fails_on_construction():
+    class IncompleteState(StateBackend):
+        shared = True
+
+    with pytest.raises(TypeError):
+        IncompleteState()
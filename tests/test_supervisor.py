@@ -0,0 +1,69 @@
+import asyncio
+import os
+import signal
+import time
+
+from at_joint.__main__ import serve
+from at_joint.__main__ import Supervisor
+
+
+def exit_now():
+    pass
+
+
+def sleep_forever():
+    time.sleep(60)
+
+
+def ignore_sigterm():
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    time.sleep(60)
+
+
+def check_until(supervisor, condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        supervisor.check()
+        time.sleep(0.01)
+    return condition()
+
+
+def test_exited_process_is_restarted_with_backoff():
+    supervisor = Supervisor({"worker": exit_now}, restart_delay=0.05, max_restart_delay=10.0)
+    supervisor.start("worker")
+    first = supervisor.processes["worker"]
+    first.join(5)
+    supervisor.check()
+    assert supervisor.failures["worker"] == 1
+    assert supervisor.processes["worker"] is first
+    assert check_until(supervisor, lambda: supervisor.processes["worker"] is not first)
+
+    supervisor.processes["worker"].join(5)
+    supervisor.check()
+    # the delay doubles with every failure in a row
+    assert supervisor.restart_at["worker"] - time.monotonic() > 0.05
+    supervisor.shutdown()
+
+
+def test_shutdown_kills_processes_that_do_not_stop():
+    supervisor = Supervisor({"worker": sleep_forever, "stubborn": ignore_sigterm}, shutdown_timeout=0.5)
+    for name in supervisor.targets:
+        supervisor.start(name)
+    time.sleep(0.2)
+    supervisor.shutdown()
+    assert supervisor.processes["worker"].exitcode == -signal.SIGTERM
+    assert supervisor.processes["stubborn"].exitcode == -signal.SIGKILL
+
+
+def test_serve_stops_on_sigterm():
+    stopped = []
+
+    async def worker():
+        try:
+            os.kill(os.getpid(), signal.SIGTERM)
+            await asyncio.sleep(5)
+        finally:
+            stopped.append(True)
+
+    asyncio.run(serve(worker()))
+    assert stopped == [True]
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from at_joint.core.at_joint import AT_BLACKBOARD
+from at_joint.core.at_joint import AT_SOLVER
+from benchmarks.fakes import FakeATJoint
+
+
+def test_sweep_runs_are_isolated():
+    pushed = []
+
+    async def sink(tacts):
+        pushed.extend(tacts)
+
+    async def run():
+        joint = FakeATJoint(blackboard_delta=True, memoize=[AT_SOLVER])
+        blackboard = joint.components[AT_BLACKBOARD]
+
+        async def reset():
+            blackboard.items.clear()
+            return True
+
+        blackboard.reset = reset
+        await joint.setup()
+        await joint.process_tact(iterate=2, wait=0)
+        assert joint.blackboard_trackers["default"].stats()["refs"]
+        result = await joint.sweep(runs=[{"name": "a"}, {"name": "b"}], iterate=3, sink=sink)
+        return joint, result
+
+    joint, result = asyncio.run(run())
+    assert [run["name"] for run in result] == ["a", "b"]
+    assert all("error" not in run and run["total"] == 3 for run in result)
+    # runs share the solver and blackboard, so they run one after another from a reset state
+    assert result[0]["tacts"][-1]["at_solver"] == result[1]["tacts"][-1]["at_solver"]
+    assert joint.rpc_counts[(AT_BLACKBOARD, "reset")] == 2
+    assert sorted({tact["run"] for tact in pushed}) == [0, 1]
+    # the blackboard no longer holds what the user's tracker remembered
+    assert "default" not in joint.blackboard_trackers
+    assert joint.memo.stats()["size"] == 0
+    assert not [key for key in joint.component_sets if "#sweep" in key]
+
+
+def test_sweep_rejects_unknown_options():
+    joint = FakeATJoint()
+    with pytest.raises(ValueError, match="speed"):
+        asyncio.run(joint.sweep(runs=[{"speed": 2}]))
+
+
+def test_blackboard_without_reset():
+    async def run():
+        joint = FakeATJoint()
+        await joint.setup()
+        result = await joint.sweep(runs=[{"name": "a"}, {"name": "b"}], iterate=2)
+        return joint, result
+
+    joint, result = asyncio.run(run())
+    assert all("error" not in run for run in result)
+    # the missing method is only asked for once
+    assert joint.rpc_counts[(AT_BLACKBOARD, "reset")] == 1
+    assert AT_BLACKBOARD in joint.reset_unsupported
+
+
+def test_sweep_and_tact_loop_of_a_user_exclude_each_other():
+    async def run():
+        joint = FakeATJoint()
+        await joint.setup()
+        loop = asyncio.ensure_future(joint.process_tact(iterate=20, wait=1))
+        await asyncio.sleep(0.005)
+        with pytest.raises(ValueError, match="tact loop"):
+            await joint.sweep(runs=[{}])
+        await loop
+        sweep = asyncio.ensure_future(joint.sweep(runs=[{}], iterate=20, wait=1))
+        await asyncio.sleep(0.005)
+        with pytest.raises(ValueError, match="sweep"):
+            await joint.process_tact(iterate=1, wait=0)
+        with pytest.raises(ValueError, match="sweep"):
+            await joint.replay(tacts=[[]])
+        await sweep
+        # another user is not held back
+        await joint.setup("other")
+        sweep = asyncio.ensure_future(joint.sweep(runs=[{}], iterate=5, wait=1))
+        await asyncio.sleep(0.002)
+        await joint.process_tact(iterate=1, wait=0, auth_token="other")
+        await sweep
+        return joint
+
+    joint = asyncio.run(run())
+    assert not joint.user_runs.loops and not joint.user_runs.sweeps
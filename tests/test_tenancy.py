@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+
+from at_joint.core.tenancy import ADMISSION_REJECT
+from at_joint.core.tenancy import AdmissionControl
+from at_joint.core.tenancy import ComponentLimiter
+from at_joint.core.tenancy import FairScheduler
+from benchmarks.fakes import FakeATJoint
+
+
+def test_component_limiter_bounds_inflight_calls():
+    limiter = ComponentLimiter(max_inflight=2)
+    peak = []
+
+    async def call():
+        async with limiter.acquire("ATSolver"):
+            peak.append(limiter.inflight["ATSolver"])
+            await asyncio.sleep(0.001)
+
+    async def run():
+        await asyncio.gather(*(call() for _ in range(6)))
+
+    asyncio.run(run())
+    assert max(peak) == 2
+
+
+def test_component_limiter_skips_unlimited_calls():
+    async def run():
+        limiter = ComponentLimiter(max_inflight=1)
+        async with limiter.acquire("ATSolver"):
+            async with limiter.acquire(None):
+                return dict(limiter.inflight)
+
+    assert asyncio.run(run()) == {"ATSolver": 1}
+
+
+def test_fair_scheduler_follows_weights():
+    scheduler = FairScheduler(slots=1, weights={"heavy": 3.0})
+    order = []
+
+    async def tacts(user, count):
+        for _ in range(count):
+            async with scheduler.turn(user):
+                order.append(user)
+                await asyncio.sleep(0)
+
+    async def run():
+        # several runs of every user, so both of them are waiting whenever a slot is released
+        await asyncio.gather(*(tacts(user, 20) for user in ("heavy", "light") for _ in range(3)))
+
+    asyncio.run(run())
+    first = order[:40]
+    assert first.count("heavy") == pytest.approx(30, abs=3)
+
+
+def test_fair_scheduler_forgets_idle_users():
+    scheduler = FairScheduler(slots=1)
+
+    async def tact(user):
+        async with scheduler.turn(user):
+            pass
+
+    async def run():
+        for index in range(100):
+            await tact(f"user-{index}")
+
+    asyncio.run(run())
+    assert len(scheduler._passes) <= 1
+    assert len(scheduler.granted) <= 1
+    assert scheduler.stats()["granted_total"] == 100
+
+
+def test_admission_rejects_over_capacity():
+    admission = AdmissionControl(max_runs=1, policy=ADMISSION_REJECT)
+
+    async def run():
+        async with admission.admit():
+            with pytest.raises(ValueError):
+                async with admission.admit():
+                    pass
+
+    asyncio.run(run())
+    assert admission.stats()["rejected"] == 1
+
+
+def test_forwarded_calls_are_not_limited():
+    async def run():
+        joint = FakeATJoint(max_inflight_per_component=1)
+        limited = []
+
+        async def exec_external_method(reciever, methode_name, method_args, auth_token=None):
+            limited.append(joint.component_limiter.inflight.get(reciever, 0))
+
+        joint.exec_external_method = exec_external_method
+        await joint.forward("ATJoint-1", "process_tact", {}, auth_token="token")
+        await joint.exec_component_method("ATSolver", "run", {}, auth_token="token")
+        return limited
+
+    assert asyncio.run(run()) == [0, 1]